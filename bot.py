@@ -1,10 +1,14 @@
 """Main Bot class with event handlers."""
 
 import asyncio
+import httpx
+import io
 import re
 import json
+import orjson
 import logging
 import sys
+import traceback
 from pathlib import Path
 from typing import Dict, List, Optional, Union, Any
 from utils.colored_logger import setup_logger, logger as log
@@ -40,6 +44,7 @@ from utils.helpers import (
     split_message,
     calculate_edit_percentage,
     is_likely_typo,
+    write_json_atomic,
 )
 from utils.steam_location_handler import SteamLocationHandler
 from utils.health_check import HealthCheck
@@ -138,7 +143,7 @@ def register_slash_commands(tree, bot: "Bot"):
             async with httpx.AsyncClient() as client:
                 r = await client.get("https://api.whatdoestrumpthink.com/api/v1/quotes/random", timeout=10)
                 r.raise_for_status()
-                quote = r.json().get("message", "Could not retrieve a quote.")
+                quote = orjson.loads(r.content).get("message", "Could not retrieve a quote.")
             embed = discord.Embed(description=f'*"{quote}"*', color=0xB32E2E)
             embed.set_author(name="Donald Trump", icon_url="https://i.imgur.com/GkZasg8.png")
             embed.set_footer(text="liforra.de | Liforras Utility bot")
@@ -160,7 +165,7 @@ def register_slash_commands(tree, bot: "Bot"):
             async with httpx.AsyncClient() as client:
                 r = await client.get("https://techy-api.vercel.app/api/json", timeout=10)
                 r.raise_for_status()
-                message = r.json().get("message", "Could not retrieve a tech tip.")
+                message = orjson.loads(r.content).get("message", "Could not retrieve a tech tip.")
             embed = discord.Embed(title="💡 Tech Tip", description=message, color=0x00D4AA)
             embed.set_thumbnail(url="https://i.imgur.com/3Q3Q1aD.png")
             embed.set_footer(text="liforra.de | Liforras Utility bot | Powered by Techy API")
@@ -193,7 +198,7 @@ def register_slash_commands(tree, bot: "Bot"):
             async with httpx.AsyncClient() as client:
                 r = await client.get(f"https://uselessfacts.jsph.pl/api/v2/facts/{fact_type}", params={"language": language}, timeout=10)
                 r.raise_for_status()
-                data = r.json()
+                data = orjson.loads(r.content)
 
             if data.get("error"):
                 await interaction.followup.send(f"❌ API Error: {data['error']}", ephemeral=_ephemeral)
@@ -375,7 +380,7 @@ def register_slash_commands(tree, bot: "Bot"):
             await interaction.response.send_message("❌ Word statistics database is not configured.", ephemeral=True)
             return
 
-        if str(interaction.user.id) not in bot.config.admin_ids:
+        if interaction.user.id not in bot.config.admin_ids:
             await interaction.response.send_message("❌ Only bot admins can run backfill.", ephemeral=True)
             return
 
@@ -393,19 +398,15 @@ def register_slash_commands(tree, bot: "Bot"):
 
         await interaction.response.defer(ephemeral=_ephemeral, thinking=True)
 
-        processed = 0
-
         try:
-            async for message in interaction.channel.history(limit=None, after=cutoff, oldest_first=True):
-                if message.author.bot or (bot.client and message.author.id == bot.client.user.id):
-                    continue
-                await handler.record_message(interaction.guild.id, message.author.id, message.content)
-                processed += 1
-                if processed % 200 == 0:
-                    await asyncio.sleep(0)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            await interaction.followup.send(f"❌ **Backfill failed:**\n```py\n{tb_str[:1800]}\n```", ephemeral=_ephemeral)
+            processed = await handler.backfill_channel(
+                interaction.channel,
+                interaction.guild.id,
+                bot.client.user.id if bot.client else None,
+                after=cutoff,
+            )
+        except Exception:
+            await interaction.followup.send(bot.error_report("Backfill failed"), ephemeral=_ephemeral)
             return
 
         await interaction.followup.send(
@@ -533,11 +534,11 @@ def register_slash_commands(tree, bot: "Bot"):
             await interaction.response.send_message(bot.oauth_handler.get_authorization_message(interaction.user.mention), ephemeral=True)
             return
         
-        if address not in bot.ip_handler.ip_geo_data:
+        geo = bot.ip_handler.ip_geo_data.get(address)
+        if geo is None:
             await interaction.response.send_message(f"❌ No data for `{address}` in database.", ephemeral=_ephemeral)
             return
 
-        geo = bot.ip_handler.ip_geo_data[address]
         flag = COUNTRY_FLAGS.get(geo.get("countryCode", ""), "🌐")
         embed = discord.Embed(title=f"{flag} Cached IP Information", description=f"**IP Address:** `{address}`", color=0x9B59B6)
         
@@ -680,7 +681,7 @@ def register_slash_commands(tree, bot: "Bot"):
                     timeout=10
                 )
                 response.raise_for_status()
-                data = response.json()
+                data = orjson.loads(response.content)
                 
                 if data.get("code") != "player.found":
                     return await interaction.followup.send(
@@ -707,10 +708,8 @@ def register_slash_commands(tree, bot: "Bot"):
                 await interaction.followup.send(f"❌ The Xbox lookup API returned an error ({e.response.status_code}). It might be temporarily down.", ephemeral=_ephemeral)
             else:
                 await interaction.followup.send(f"❌ API Error: {e.response.status_code}", ephemeral=_ephemeral)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await interaction.followup.send(error_message, ephemeral=_ephemeral)
+        except Exception:
+            await interaction.followup.send(bot.error_report("An unexpected error occurred"), ephemeral=_ephemeral)
 
     @bot.app_commands.allowed_installs(guilds=True, users=True)
     @bot.app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
@@ -727,7 +726,7 @@ def register_slash_commands(tree, bot: "Bot"):
             async with httpx.AsyncClient() as client:
                 r = await client.get(f"https://liforra.de/api/namehistory?username={username}", timeout=15)
                 r.raise_for_status()
-                data = r.json()
+                data = orjson.loads(r.content)
             
             if not data.get("history"):
                 await interaction.followup.send(f"❌ No name history found for `{discord.utils.escape_markdown(username)}`.", ephemeral=_ephemeral)
@@ -764,10 +763,8 @@ def register_slash_commands(tree, bot: "Bot"):
             await interaction.followup.send(embed=embed, ephemeral=_ephemeral)
         except httpx.HTTPStatusError as e:
             await interaction.followup.send(f"❌ API Error: {e.response.status_code}", ephemeral=_ephemeral)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await interaction.followup.send(error_message, ephemeral=_ephemeral)
+        except Exception:
+            await interaction.followup.send(bot.error_report("An unexpected error occurred"), ephemeral=_ephemeral)
 
     @bot.app_commands.allowed_installs(guilds=True, users=True)
     @bot.app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
@@ -792,10 +789,8 @@ def register_slash_commands(tree, bot: "Bot"):
         
         search_term = username
         found_user = None
-        lowercase_map = {k.lower(): k for k in bot.alts_handler.alts_data.keys()}
-        for candidate in [search_term, f".{search_term}", f"...{search_term}"]:
-            if candidate.lower() in lowercase_map:
-                found_user = lowercase_map[candidate.lower()]
+        for candidate in (search_term, f".{search_term}", f"...{search_term}"):
+            if found_user := bot.alts_handler.find_user(candidate):
                 break
 
         if not found_user:
@@ -803,10 +798,10 @@ def register_slash_commands(tree, bot: "Bot"):
             return
 
         data = bot.alts_handler.alts_data[found_user]
-        alts = sorted(list(data.get("alts", set())))
-        ips = sorted(list(data.get("ips", set())))
+        alts = sorted(data.alts)
+        ips = sorted(data.ips)
         
-        is_admin = str(interaction.user.id) in bot.config.admin_ids
+        is_admin = interaction.user.id in bot.config.admin_ids
         show_ips = _ip and is_admin
         embeds = []
         
@@ -821,8 +816,8 @@ def register_slash_commands(tree, bot: "Bot"):
                 except Exception:
                     return None
 
-        first_seen_ts = _safe_timestamp(data.get("first_seen"))
-        last_updated_ts = _safe_timestamp(data.get("last_updated"))
+        first_seen_ts = _safe_timestamp(data.first_seen)
+        last_updated_ts = _safe_timestamp(data.last_updated)
 
         desc_lines = []
         desc_lines.append(f"First Seen: <t:{first_seen_ts}:F>" if first_seen_ts is not None else "First Seen: Unknown")
@@ -885,7 +880,7 @@ def register_slash_commands(tree, bot: "Bot"):
             async with httpx.AsyncClient() as client:
                 response = await client.get(f"https://api.numlookupapi.com/v1/validate/{number}", headers={"apikey": bot.config.numlookup_api_key}, timeout=10)
                 response.raise_for_status()
-                data = response.json()
+                data = orjson.loads(response.content)
                 
                 if not data.get("valid"):
                     await interaction.followup.send(f"❌ Invalid phone number: `{number}`", ephemeral=_ephemeral)
@@ -915,10 +910,8 @@ def register_slash_commands(tree, bot: "Bot"):
             if e.response.status_code == 401: await interaction.followup.send("❌ Invalid NumLookupAPI key.", ephemeral=_ephemeral)
             elif e.response.status_code == 429: await interaction.followup.send("⏱️ API rate limit exceeded.", ephemeral=_ephemeral)
             else: await interaction.followup.send(f"❌ API Error: {e.response.status_code}", ephemeral=_ephemeral)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await interaction.followup.send(error_message, ephemeral=_ephemeral)
+        except Exception:
+            await interaction.followup.send(bot.error_report("An unexpected error occurred"), ephemeral=_ephemeral)
 
     @bot.app_commands.allowed_installs(guilds=True, users=True)
     @bot.app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
@@ -941,40 +934,35 @@ def register_slash_commands(tree, bot: "Bot"):
             return
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://api.shodan.io/shodan/host/{ip}", params={"key": bot.config.shodan_api_key}, timeout=20)
-                response.raise_for_status()
-                data = response.json()
-                
-                flag = COUNTRY_FLAGS.get(data.get("country_code", ""), "🌐")
-                embed = discord.Embed(title=f"🔍 Shodan: {ip}", url=f"https://www.shodan.io/host/{ip}", color=0xE74C3C, timestamp=datetime.now())
-                
-                embed.add_field(name=f"{flag} Country", value=data.get('country_name', 'N/A'), inline=True)
-                embed.add_field(name="Organization", value=data.get('org', 'N/A'), inline=True)
-                embed.add_field(name="ISP", value=data.get('isp', 'N/A'), inline=True)
-                embed.add_field(name="ASN", value=data.get('asn', 'N/A'), inline=True)
-                
-                if hostnames := data.get('hostnames', []):
-                    embed.add_field(name="Hostnames", value=', '.join(hostnames[:5]) + (' ...' if len(hostnames) > 5 else ''), inline=False)
-                if ports := data.get('ports', []):
-                    embed.add_field(name=f"Open Ports ({len(ports)})", value=', '.join(map(str, ports[:20])) + (' ...' if len(ports) > 20 else ''), inline=False)
-                if vulns := data.get('vulns', []):
-                    vuln_text = ', '.join(vulns[:5]) + (f" (+{len(vulns) - 5} more)" if len(vulns) > 5 else "")
-                    embed.add_field(name=f"⚠️ Vulnerabilities ({len(vulns)})", value=vuln_text, inline=False)
-                if tags := data.get('tags', []):
-                    embed.add_field(name="Tags", value=', '.join(tags), inline=False)
-                
-                embed.set_footer(text="liforra.de | Liforras Utility bot | Powered by Shodan")
-                await interaction.followup.send(embed=embed, ephemeral=_ephemeral)
-                
+            data = await bot.user_commands_handler._fetch_shodan_host(ip)
+            
+            flag = COUNTRY_FLAGS.get(data.get("country_code", ""), "🌐")
+            embed = discord.Embed(title=f"🔍 Shodan: {ip}", url=f"https://www.shodan.io/host/{ip}", color=0xE74C3C, timestamp=datetime.now())
+            
+            embed.add_field(name=f"{flag} Country", value=data.get('country_name', 'N/A'), inline=True)
+            embed.add_field(name="Organization", value=data.get('org', 'N/A'), inline=True)
+            embed.add_field(name="ISP", value=data.get('isp', 'N/A'), inline=True)
+            embed.add_field(name="ASN", value=data.get('asn', 'N/A'), inline=True)
+            
+            if hostnames := data.get('hostnames', []):
+                embed.add_field(name="Hostnames", value=', '.join(hostnames[:5]) + (' ...' if len(hostnames) > 5 else ''), inline=False)
+            if ports := data.get('ports', []):
+                embed.add_field(name=f"Open Ports ({len(ports)})", value=', '.join(map(str, ports[:20])) + (' ...' if len(ports) > 20 else ''), inline=False)
+            if vulns := data.get('vulns', []):
+                vuln_text = ', '.join(vulns[:5]) + (f" (+{len(vulns) - 5} more)" if len(vulns) > 5 else "")
+                embed.add_field(name=f"⚠️ Vulnerabilities ({len(vulns)})", value=vuln_text, inline=False)
+            if tags := data.get('tags', []):
+                embed.add_field(name="Tags", value=', '.join(tags), inline=False)
+            
+            embed.set_footer(text="liforra.de | Liforras Utility bot | Powered by Shodan")
+            await interaction.followup.send(embed=embed, ephemeral=_ephemeral)
+            
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 401: await interaction.followup.send("❌ Invalid Shodan API key.", ephemeral=_ephemeral)
             elif e.response.status_code == 404: await interaction.followup.send(f"❌ No information available for `{ip}`.", ephemeral=_ephemeral)
             else: await interaction.followup.send(f"❌ API Error: {e.response.status_code}", ephemeral=_ephemeral)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await interaction.followup.send(error_message, ephemeral=_ephemeral)
+        except Exception:
+            await interaction.followup.send(bot.error_report("An unexpected error occurred"), ephemeral=_ephemeral)
 
     @bot.app_commands.allowed_installs(guilds=True, users=True)
     @bot.app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
@@ -986,7 +974,7 @@ def register_slash_commands(tree, bot: "Bot"):
         embed.add_field(name="🎮 General", value="`/trump`, `/tech`, `/fact`, `/search`\n`/websites`, `/pings`, `/playerinfo`, `/namehistory`", inline=False)
         embed.add_field(name="🌐 Network Tools", value="`/ip`, `/ipdbinfo`, `/ipdblist`, `/ipdbsearch`, `/ipdbstats`\n`/phone`, `/shodan`", inline=False)
         embed.add_field(name="👥 Alt Lookup", value="`/alts` (Rate limited: 2/min)", inline=False)
-        if str(interaction.user.id) in bot.config.admin_ids:
+        if interaction.user.id in bot.config.admin_ids:
             embed.add_field(name="⚙️ Admin", value="`/altsrefresh`, `/ipdbrefresh`, `/reloadconfig`\n`/configget`, `/configset`, `/configdebug`", inline=False)
         embed.add_field(name="💡 Tip", value="Most commands have an `_ephemeral` option to make the response visible only to you.", inline=False)
         embed.set_footer(text="liforra.de | Liforras Utility bot")
@@ -1000,7 +988,7 @@ def register_slash_commands(tree, bot: "Bot"):
     @bot.app_commands.describe(_ephemeral="Show the response only to you (default: False)")
     async def restart_slash(interaction: discord.Interaction, _ephemeral: bool = False):
         bot.log_command(interaction.user.id, str(interaction.user), "restart", [], is_slash=True)
-        if not str(interaction.user.id) in bot.config.admin_ids:
+        if interaction.user.id not in bot.config.admin_ids:
             return await interaction.response.send_message("❌ This command is admin-only.", ephemeral=True)
         await interaction.response.send_message("Restarting...", ephemeral=_ephemeral)
         await bot.client.close()
@@ -1011,20 +999,18 @@ def register_slash_commands(tree, bot: "Bot"):
     @bot.app_commands.describe(_ephemeral="Show the response only to you (default: False)")
     async def reloadconfig_slash(interaction: discord.Interaction, _ephemeral: bool = False):
         bot.log_command(interaction.user.id, str(interaction.user), "reloadconfig", [], is_slash=True)
-        if not str(interaction.user.id) in bot.config.admin_ids:
+        if interaction.user.id not in bot.config.admin_ids:
             return await interaction.response.send_message("❌ This command is admin-only.", ephemeral=True)
         await interaction.response.defer(ephemeral=_ephemeral)
         try:
             bot.config.load_config()
             bot.load_notes()
-            bot.alts_handler.load_and_preprocess_alts_data()
+            await bot.alts_handler.load_and_preprocess_alts_data_async()
             bot.ip_handler.load_ip_geo_data()
             embed = discord.Embed(title="✅ Config Reloaded", description="Successfully reloaded all configuration files.", color=0x2ECC71, timestamp=datetime.now())
             await interaction.followup.send(embed=embed, ephemeral=_ephemeral)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **Failed to reload config:**\n```py\n{tb_str[:1800]}\n```"
-            await interaction.followup.send(error_message, ephemeral=_ephemeral)
+        except Exception:
+            await interaction.followup.send(bot.error_report("Failed to reload config"), ephemeral=_ephemeral)
 
 # =================================================================================
 # END OF SLASH COMMAND REGISTRATION
@@ -1095,9 +1081,11 @@ class Bot:
         self.phone_handler = None
         self.word_stats_handler = None
         self.mc_server_handler = MCServerHandler(data_dir)
+        self.shodan_client: Optional[httpx.AsyncClient] = None
         self.user_commands_handler = UserCommands(self)
         self.admin_commands_handler = AdminCommands(self)
         self.health_check = HealthCheck(self, data_dir)
+        self._alts_flush_task: Optional[asyncio.Task] = None
 
         self._auth_check_timeout = 3.0
         self.notes_data = {"public": {}, "private": {}}
@@ -1186,6 +1174,16 @@ class Bot:
         user_limits.append(now)
         return True, 0
 
+    def error_report(self, title: str) -> str:
+        """Logs the active exception and returns the message to show the user.
+
+        The (capped) traceback is only included when `debug-tracebacks` is enabled.
+        """
+        logger.exception(title)
+        if self.config.debug_tracebacks:
+            return f"❌ **{title}:**\n```py\n{traceback.format_exc()[:1800]}\n```"
+        return f"❌ {title} (see logs)."
+
     def log_command(self, user_id: int, username: str, command: str, args: list = None, is_slash: bool = False):
         """Logs command usage to command.log file."""
         try:
@@ -1244,10 +1242,23 @@ class Bot:
             )
         
         self.alts_handler = AltsHandler(self.data_dir, self.config.default_clean_spigey)
-        self.alts_handler.load_and_preprocess_alts_data()
+        # Nothing stores alts data before the client starts, so the worker process is safe here
+        await self.alts_handler.load_and_preprocess_alts_data_in_worker()
         self.load_notes()
 
-        await self.client.start(self.token)
+        self.shodan_client = httpx.AsyncClient(
+            base_url="https://api.shodan.io",
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=httpx.Timeout(20.0),
+        )
+        try:
+            await self.client.start(self.token)
+        finally:
+            await self.shodan_client.aclose()
+            await self.ip_handler.aclose()
+            await self.logging_handler.aclose()
+            await self.mc_server_handler.aclose()
+            self.alts_handler.save_if_dirty()
 
     def load_notes(self):
         if self.notes_file.exists():
@@ -1262,8 +1273,7 @@ class Bot:
 
     def save_notes(self):
         try:
-            with open(self.notes_file, "w", encoding="utf-8") as f: 
-                json.dump(self.notes_data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.notes_file, self.notes_data)
         except Exception as e: 
             print(f"[{self.data_dir.name}] Error saving notes: {e}")
 
@@ -1327,6 +1337,15 @@ class Bot:
             else: print(f"[{self.client.user}] Error sending message: {e}")
         return None
 
+    async def bot_send_long(self, channel, content: str, filename: str = "output.txt"):
+        """Sends `content`, uploading it as one text attachment if it would otherwise be split."""
+        if len(content) <= 1900:
+            return await self.bot_send(channel, content=content)
+        censored = self.censor_text(content, channel.guild.id if hasattr(channel, "guild") and channel.guild else None)
+        header = censored.split("\n", 1)[0]
+        attachment = self.discord.File(io.BytesIO(censored.encode("utf-8")), filename=filename)
+        return await self.bot_send(channel, content=header, files=[attachment])
+
     async def cleanup_forward_cache(self):
         await self.client.wait_until_ready()
         while not self.client.is_closed():
@@ -1350,6 +1369,15 @@ class Bot:
             for k in edit_expired: del self.edit_history[k]
             if edit_expired: print(f"[{self.client.user}] Cleaned {len(edit_expired)} old edit history entries.")
 
+    async def flush_alts_data(self):
+        """Writes alts data stored since the last flush, at most every 30 seconds."""
+        while not self.client.is_closed():
+            await asyncio.sleep(30)
+            try:
+                self.alts_handler.save_if_dirty()
+            except Exception as e:
+                print(f"[{self.client.user}] Error flushing alts data: {e}")
+
     async def auto_refresh_alts(self):
         await self.client.wait_until_ready()
         await asyncio.sleep(60)
@@ -1382,13 +1410,11 @@ class Bot:
         try:
             if command_name in self.user_commands:
                 await self.user_commands[command_name](message, args)
-            elif command_name in self.admin_commands and str(message.author.id) in self.config.admin_ids:
+            elif command_name in self.admin_commands and message.author.id in self.config.admin_ids:
                 await self.admin_commands[command_name](message, args)
         except Exception as e:
             print(f"[{self.client.user}] Error in command '{command_name}': {e}")
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot_send(message.channel, content=error_message)
+            await self.bot_send(message.channel, content=self.error_report("An unexpected error occurred"))
 
     async def on_ready(self):
         """Initialize components when bot is ready."""
@@ -1405,6 +1431,9 @@ class Bot:
         if hasattr(self, 'user_commands_handler'):
             await self.user_commands_handler.update_help_texts()
         self.client.loop.create_task(self.health_check.run_checks())
+        # on_ready fires again after reconnects; keep a single flush loop
+        if self._alts_flush_task is None or self._alts_flush_task.done():
+            self._alts_flush_task = self.client.loop.create_task(self.flush_alts_data())
 
     async def on_presence_update(self, before, after): pass
 
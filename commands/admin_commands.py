@@ -1,7 +1,6 @@
 """Admin-only commands."""
 
 import discord
-import toml
 import json
 import re
 import io
@@ -71,7 +70,7 @@ class AdminCommands:
         try:
             self.bot.config.load_config()
             self.bot.load_notes()
-            self.bot.alts_handler.load_and_preprocess_alts_data()
+            await self.bot.alts_handler.load_and_preprocess_alts_data_async()
             self.bot.ip_handler.load_ip_geo_data()
             await self.bot.bot_send(
                 message.channel,
@@ -106,8 +105,7 @@ class AdminCommands:
                 override_key, {}
             ).setdefault(match.group(), {})[setting] = value
             try:
-                with open(self.bot.config.config_file, "w", encoding="utf-8") as f:
-                    toml.dump(self.bot.config.config_data, f)
+                self.bot.config.save_config()
                 await self.bot.bot_send(
                     message.channel,
                     f"✅ Set {override_type} override: {setting} = {value}",
@@ -141,13 +139,15 @@ class AdminCommands:
                 value = self.bot.config.config_data
                 for key in path_to_get.split("."):
                     value = value[key]
-                censored_value = self.bot.config.censor_recursive(path_to_get, value)
-                display_str = (
-                    json.dumps(censored_value, indent=2)
-                    if isinstance(censored_value, dict)
-                    else f"`{censored_value}`"
+                censored_value = (
+                    self.bot.config.censored_table(path_to_get)
+                    if isinstance(value, dict)
+                    else self.bot.config.censor_value(path_to_get, value)
                 )
                 if isinstance(censored_value, dict):
+                    display_str = json.dumps(
+                        censored_value, indent=2, ensure_ascii=False, default=str
+                    )
                     await self.bot.bot_send(
                         message.channel,
                         content=f"✅ `{path_to_get}` =\n```json\n{display_str}\n```",
@@ -155,7 +155,7 @@ class AdminCommands:
                 else:
                     await self.bot.bot_send(
                         message.channel,
-                        content=f"✅ `{path_to_get}` = {display_str}",
+                        content=f"✅ `{path_to_get}` = `{censored_value}`",
                     )
             except (KeyError, TypeError):
                 await self.bot.bot_send(
@@ -177,8 +177,7 @@ class AdminCommands:
                 for key in keys[:-1]:
                     target = target.setdefault(key, {})
                 target[keys[-1]] = self.bot.config.parse_value(new_value_str)
-                with open(self.bot.config.config_file, "w", encoding="utf-8") as f:
-                    toml.dump(self.bot.config.config_data, f)
+                self.bot.config.save_config()
                 await self.bot.bot_send(
                     message.channel,
                     f"✅ Set `{path}` to `{target[keys[-1]]}` and saved.",
@@ -195,7 +194,7 @@ class AdminCommands:
             )
             debug_info = f"""```ini
 [Debug Info for {self.bot.client.user}]
-Is Admin = {str(uid) in self.bot.config.admin_ids}
+Is Admin = {uid in self.bot.config.admin_ids}
 Prefix = {self.bot.config.get_prefix(gid)}
 Message Log = {self.bot.config.get_guild_config(gid, "message-log", self.bot.config.default_message_log, uid, cid)}
 Attachment Log = {self.bot.config.get_attachment_log_setting(gid, uid, cid)}
@@ -291,24 +290,12 @@ Match Status = {self.bot.config.match_status}
         )
 
         cutoff = None if days is None else datetime.now(timezone.utc) - timedelta(days=days)
-        processed = 0
-
         try:
-            history_kwargs = {"limit": None, "oldest_first": True}
-            if cutoff:
-                history_kwargs["after"] = cutoff
-
-            async for entry in message.channel.history(**history_kwargs):
-                if entry.author.bot or entry.author.id == self.bot.client.user.id:
-                    continue
-                await handler.record_message(message.guild.id, entry.author.id, entry.content)
-                processed += 1
-                if processed % 200 == 0:
-                    await asyncio.sleep(0)
-        except Exception as e:
-            tb_str = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **Backfill failed:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+            processed = await handler.backfill_channel(
+                message.channel, message.guild.id, self.bot.client.user.id, after=cutoff
+            )
+        except Exception:
+            await self.bot.bot_send(message.channel, content=self.bot.error_report("Backfill failed"))
             return
 
         await self.bot.bot_send(
@@ -429,15 +416,14 @@ Match Status = {self.bot.config.match_status}
             to_delete = [
                 user
                 for user, data in self.bot.alts_handler.alts_data.items()
-                if len(data.get("ips", set())) == 0
-                and len(data.get("alts", set())) <= 1
+                if not data.ips
+                and len(data.alts) <= 1
             ]
             if not to_delete:
                 return await self.bot.bot_send(
                     message.channel, "✅ No empty entries to clean."
                 )
-            for user in to_delete:
-                del self.bot.alts_handler.alts_data[user]
+            self.bot.alts_handler.remove_users(to_delete)
             self.bot.alts_handler.save_alts_data()
             return await self.bot.bot_send(
                 message.channel, f"✅ Cleaned {len(to_delete)} lone/empty entries."
@@ -465,23 +451,11 @@ Match Status = {self.bot.config.match_status}
 
         if subcommand == "stats":
             total_users = len(self.bot.alts_handler.alts_data)
-            all_ips = set().union(
-                *(
-                    data.get("ips", set())
-                    for data in self.bot.alts_handler.alts_data.values()
-                )
-            )
-            stats = f"**Alts DB Stats:**\n- Users: {total_users}\n- Unique IPs: {len(all_ips)}\n- Cached IP Geo Data: {len(self.bot.ip_handler.ip_geo_data)}"
+            stats = f"**Alts DB Stats:**\n- Users: {total_users}\n- Unique IPs: {len(self.bot.alts_handler.all_ips)}\n- Cached IP Geo Data: {len(self.bot.ip_handler.ip_geo_data)}"
             return await self.bot.bot_send(message.channel, content=stats)
 
         elif subcommand == "list":
-            users = sorted(
-                [
-                    user
-                    for user in self.bot.alts_handler.alts_data.keys()
-                    if not (is_valid_ipv4(user) or is_valid_ipv6(user))
-                ]
-            )
+            users = self.bot.alts_handler.sorted_usernames
             page = int(args[1]) if len(args) > 1 and args[1].isdigit() else 1
             per_page = 20
             start = (page - 1) * per_page
@@ -496,7 +470,7 @@ Match Status = {self.bot.config.match_status}
                 data = self.bot.alts_handler.alts_data[user]
                 formatted_user_name = format_alt_name(user)
                 output.append(
-                    f"• {formatted_user_name} - {len(data.get('alts', []))} alts, {len(data.get('ips', []))} IPs"
+                    f"• {formatted_user_name} - {len(data.alts)} alts, {len(data.ips)} IPs"
                 )
             if total_pages > page:
                 output.append(f"\nUse `{p}alts list {page + 1}` for next page.")
@@ -506,13 +480,8 @@ Match Status = {self.bot.config.match_status}
             search_term = args[0]
             found_user = None
 
-            lowercase_map = {
-                k.lower(): k for k in self.bot.alts_handler.alts_data.keys()
-            }
-
             if search_term.startswith("."):
-                if search_term.lower() in lowercase_map:
-                    found_user = lowercase_map[search_term.lower()]
+                found_user = self.bot.alts_handler.find_user(search_term)
             else:
                 search_candidates = [
                     search_term,
@@ -520,8 +489,7 @@ Match Status = {self.bot.config.match_status}
                     f"...{search_term}",
                 ]
                 for candidate in search_candidates:
-                    if candidate.lower() in lowercase_map:
-                        found_user = lowercase_map[candidate.lower()]
+                    if found_user := self.bot.alts_handler.find_user(candidate):
                         break
 
             if not found_user:
@@ -530,8 +498,8 @@ Match Status = {self.bot.config.match_status}
                 )
 
             data = self.bot.alts_handler.alts_data[found_user]
-            alts = sorted(list(data.get("alts", set())))
-            ips = sorted(list(data.get("ips", set())))
+            alts = sorted(data.alts)
+            ips = sorted(data.ips)
 
             formatted_found_user = format_alt_name(found_user)
             output = [f"**Alts data for {formatted_found_user}:**"]
@@ -544,13 +512,13 @@ Match Status = {self.bot.config.match_status}
 
             if ips:
                 output.append(f"\n**IPs ({len(ips)}):**")
-                for ip in ips:
-                    output.append(f"→ {self.bot.ip_handler.format_ip_with_geo(ip)}")
+                format_ip = self.bot.ip_handler.format_ip_with_geo
+                output.extend([f"→ {format_ip(ip)}" for ip in ips])
 
             output.append(
-                f"\n*First seen: {data.get('first_seen', 'N/A')[:10]} | Last updated: {data.get('last_updated', 'N/A')[:10]}*"
+                f"\n*First seen: {data.first_seen[:10]} | Last updated: {data.last_updated[:10]}*"
             )
-            await self.bot.bot_send(message.channel, content="\n".join(output))
+            await self.bot.bot_send_long(message.channel, "\n".join(output), filename="alts.txt")
 
         if self.bot.alts_handler.alts_command_counter >= 3:
             await self.bot.bot_send(
@@ -575,9 +543,7 @@ Match Status = {self.bot.config.match_status}
             if username in visited_users:
                 continue
 
-            group_users = self.bot.alts_handler.alts_data.get(username, {}).get(
-                "alts", {username}
-            )
+            group_users = self.bot.alts_handler.alts_data[username].alts
             ips_to_move = {
                 alt for alt in group_users if is_valid_ipv4(alt) or is_valid_ipv6(alt)
             }
@@ -588,16 +554,14 @@ Match Status = {self.bot.config.match_status}
 
                 for member in list(group_users):
                     if member in self.bot.alts_handler.alts_data:
-                        self.bot.alts_handler.alts_data[member][
-                            "alts"
-                        ].difference_update(ips_to_move)
-                        self.bot.alts_handler.alts_data[member]["ips"].update(
-                            ips_to_move
-                        )
+                        record = self.bot.alts_handler.alts_data[member]
+                        record.alts.difference_update(ips_to_move)
+                        record.ips.update(ips_to_move)
 
             visited_users.update(group_users)
 
         if ips_moved > 0:
+            self.bot.alts_handler.rebuild_indexes()
             self.bot.alts_handler.save_alts_data()
             summary = f"✅ **IP Cleanup Complete!**\n- Moved `{ips_moved}` IPs from alt lists across `{groups_affected}` user groups.\n- Database has been saved."
             await self.bot.bot_send(message.channel, content=summary)
@@ -623,26 +587,21 @@ Match Status = {self.bot.config.match_status}
         )
 
         cleaned_links = {}
-        original_group = (
-            self.bot.alts_handler.alts_data[spigey_user]
-            .get("alts", {spigey_user})
-            .copy()
-        )
-
         spigey_data = self.bot.alts_handler.alts_data[spigey_user]
-        original_spigey_alts = spigey_data.get("alts", set()).copy()
+        original_group = set(spigey_data.alts)
+        original_spigey_alts = set(spigey_data.alts)
         legit_spigey_alts = {
             alt
             for alt in original_spigey_alts
             if alt == spigey_user or alt.startswith("...")
         }
 
-        spigey_data["alts"] = legit_spigey_alts
-        spigey_data["ips"] = {valid_ip}
+        spigey_data.alts = legit_spigey_alts
+        spigey_data.ips = {valid_ip}
 
         removed_from_spigey = original_spigey_alts - legit_spigey_alts
         if removed_from_spigey:
-            cleaned_links[spigey_user] = sorted(list(removed_from_spigey))
+            cleaned_links[spigey_user] = sorted(removed_from_spigey)
 
         users_cleaned_count = 0
         for user in original_group:
@@ -650,16 +609,17 @@ Match Status = {self.bot.config.match_status}
                 continue
 
             user_data = self.bot.alts_handler.alts_data[user]
-            original_user_alts = user_data.get("alts", set()).copy()
+            original_user_alts = user_data.alts
 
-            user_data["alts"].difference_update(original_group)
-            user_data["alts"].add(user)
+            # Group members share one alts set, so give each user a new one
+            user_data.alts = (original_user_alts - original_group) | {user}
 
-            removed_from_user = original_user_alts - user_data["alts"]
+            removed_from_user = original_user_alts - user_data.alts
             if removed_from_user:
                 users_cleaned_count += 1
-                cleaned_links[user] = sorted(list(removed_from_user))
+                cleaned_links[user] = sorted(removed_from_user)
 
+        self.bot.alts_handler.rebuild_indexes()
         self.bot.alts_handler.save_alts_data()
 
         report = [f"✅ **Spigey Cleanup Report**"]
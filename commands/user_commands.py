@@ -6,21 +6,34 @@ import asyncio
 import re
 import json
 import logging
+import orjson
+import time
 import traceback
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 from types import SimpleNamespace
+from urllib.parse import quote_plus
 
 # Import logger from the main bot
 from bot import logger
-from utils.helpers import format_alt_name, format_alts_grid, is_valid_ip, is_valid_ipv4, is_valid_ipv6
+from utils.helpers import format_alt_name, format_alts_grid, is_valid_ipv4, is_valid_ipv6
 from utils.constants import COUNTRY_FLAGS
+from utils.rate_limiter import get_bucket
 
 # Add a logger for this module
 logger = logger.getChild('user_commands')
 logger.info("User commands module initialized")
 
+_MENTION_RE = re.compile(r"<@!?([0-9]+)>")
+_SCOPE_GLOBAL = frozenset({"global", "overall"})
+_SCOPE_GUILD = frozenset({"guild", "server"})
+
+
+class _FetchAbandoned(Exception):
+    """Set on a shared in-flight fetch whose leading caller was cancelled."""
+
 
 class UserCommands:
     def __init__(self, bot):
@@ -39,6 +52,64 @@ class UserCommands:
         self._model_cache_ttl = timedelta(minutes=10)
         self._model_banlist: Dict[str, datetime] = {}
         self._model_ban_ttl = timedelta(hours=1)
+        self._api_cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._api_cache_ttl = 300.0
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    async def _cached_get(
+        self,
+        key: Tuple,
+        fetch_fn: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Returns a cached third-party API result for `key`, fetching it when missing or stale.
+
+        Concurrent callers asking for the same key share a single in-flight fetch.
+        If the caller running that fetch is cancelled, the others retry on their own.
+        """
+        now = time.monotonic()
+        cached = self._api_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        if (pending := self._inflight.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending)
+            except _FetchAbandoned:
+                return await self._cached_get(key, fetch_fn, ttl)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch_fn()
+        except asyncio.CancelledError:
+            # Cancelling the shared future would cancel every waiter; tell them to retry instead
+            future.set_exception(_FetchAbandoned())
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._inflight.pop(key, None)
+
+        self._api_cache[key] = (now + (ttl if ttl is not None else self._api_cache_ttl), result)
+        if len(self._api_cache) > 512:
+            expired = [k for k, (expires_at, _) in self._api_cache.items() if expires_at <= now]
+            for k in expired:
+                del self._api_cache[k]
+        return result
+
+    async def _report_error(self, channel, title: str):
+        """Logs the active exception and tells the channel something went wrong.
+
+        The traceback is only posted in-channel when `debug-tracebacks` is enabled.
+        """
+        await self.bot.bot_send(channel, content=self.bot.error_report(title))
 
     async def update_help_texts(self):
         """Refresh help text descriptions once the client is available."""
@@ -127,7 +198,7 @@ class UserCommands:
             async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
                 resp = await client.get("https://api.groq.com/openai/v1/models", headers=headers)
                 resp.raise_for_status()
-                payload = resp.json()
+                payload = orjson.loads(resp.content)
         except Exception as exc:
             print(f"[Groq] Failed to fetch models: {exc}")
             return self._model_cache["models"]
@@ -522,7 +593,7 @@ class UserCommands:
                     timeout=10,
                 )
                 response.raise_for_status()
-                quote = response.json().get("message", "Could not retrieve a quote.")
+                quote = orjson.loads(response.content).get("message", "Could not retrieve a quote.")
                 await self.bot.bot_send(
                     message.channel, content=f'"{quote}" ~Donald Trump'
                 )
@@ -722,7 +793,7 @@ class UserCommands:
                 )
                 if note_name in guild_notes and (
                     guild_notes[note_name]["author"] == str(message.author.id)
-                    or str(message.author.id) in self.bot.config.admin_ids
+                    or message.author.id in self.bot.config.admin_ids
                 ):
                     del guild_notes[note_name]
                     deleted = True
@@ -760,7 +831,8 @@ class UserCommands:
                 )
 
             ip = args[1]
-            if not is_valid_ip(ip):
+            is_v6 = is_valid_ipv6(ip)
+            if not (is_v6 or is_valid_ipv4(ip)):
                 return await self.bot.bot_send(
                     message.channel, content="❌ Invalid IP address format"
                 )
@@ -776,7 +848,7 @@ class UserCommands:
 
             flag = COUNTRY_FLAGS.get(ip_data.get("countryCode", ""), "🌐")
 
-            ip_header = f"**IP Information for [{ip}](<https://whatismyipaddress.com/ip/{ip}>):**" if not is_valid_ipv6(ip) else f"**IP Information for `{ip}`:**"
+            ip_header = f"**IP Information for [{ip}](<https://whatismyipaddress.com/ip/{ip}>):**" if not is_v6 else f"**IP Information for `{ip}`:**"
 
             output = [
                 ip_header,
@@ -812,7 +884,7 @@ class UserCommands:
                 )
 
             db_subcommand = args[1].lower()
-            is_admin = str(message.author.id) in self.bot.config.admin_ids
+            is_admin = message.author.id in self.bot.config.admin_ids
             
             if db_subcommand != "stats" and not is_admin:
                 return await self.bot.bot_send(
@@ -821,31 +893,41 @@ class UserCommands:
                 )
 
             if db_subcommand == "stats":
-                total_ips = len(self.bot.ip_handler.ip_geo_data)
-                countries = {geo["countryCode"] for geo in self.bot.ip_handler.ip_geo_data.values() if geo.get("countryCode")}
-                vpn_count = sum(1 for geo in self.bot.ip_handler.ip_geo_data.values() if self.bot.ip_handler.detect_vpn_provider(geo.get("isp", ""), geo.get("org", "")) or geo.get("proxy"))
-                hosting_count = sum(1 for geo in self.bot.ip_handler.ip_geo_data.values() if geo.get("hosting"))
-
-                output = [
-                    "**IP Database Statistics:**",
-                    f"📊 **Total IPs:** {total_ips}",
-                    f"🌍 **Unique Countries:** {len(countries)}",
-                    f"🔒 **VPN/Proxy IPs:** {vpn_count}",
-                    f"☁️ **VPS/Hosting IPs:** {hosting_count}",
-                    "",
-                    "*liforra.de | Liforras Utility bot*"
-                ]
-                await self.bot.bot_send(message.channel, content="\n".join(output))
+                ip_handler = self.bot.ip_handler
+                total_ips = len(ip_handler.ip_geo_data)
+                country_counts = Counter()
+                vpn_count = hosting_count = 0
+                for geo in ip_handler.ip_geo_data.values():
+                    if country_code := geo.get("countryCode"):
+                        country_counts[country_code] += 1
+                    if geo.get("proxy") or ip_handler.detect_vpn_provider(geo.get("isp", ""), geo.get("org", "")):
+                        vpn_count += 1
+                    if geo.get("hosting"):
+                        hosting_count += 1
+
+                await self.bot.bot_send(
+                    message.channel,
+                    content=(
+                        "**IP Database Statistics:**\n"
+                        f"📊 **Total IPs:** {total_ips}\n"
+                        f"🌍 **Unique Countries:** {len(country_counts)}\n"
+                        f"🔒 **VPN/Proxy IPs:** {vpn_count}\n"
+                        f"☁️ **VPS/Hosting IPs:** {hosting_count}\n"
+                        "\n"
+                        "*liforra.de | Liforras Utility bot*"
+                    ),
+                )
 
             elif db_subcommand == "info":
                 if len(args) < 3:
                     return await self.bot.bot_send(message.channel, content=f"Usage: `{p}ip db info <ip>`")
                 ip = args[2]
-                if ip not in self.bot.ip_handler.ip_geo_data:
+                geo = self.bot.ip_handler.ip_geo_data.get(ip)
+                if geo is None:
                     return await self.bot.bot_send(message.channel, content=f"❌ No data for `{ip}` in database")
-                geo = self.bot.ip_handler.ip_geo_data[ip]
-                flag = COUNTRY_FLAGS.get(geo.get("countryCode", ""), "🌐")
-                ip_header = f"**Cached IP Information for [{ip}](<https://whatismyipaddress.com/ip/{ip}>):**" if not is_valid_ipv6(ip) else f"**Cached IP Information for `{ip}`:**"
+                is_v6 = is_valid_ipv6(ip)
+                flag = geo["flag"]
+                ip_header = f"**Cached IP Information for [{ip}](<https://whatismyipaddress.com/ip/{ip}>):**" if not is_v6 else f"**Cached IP Information for `{ip}`:**"
                 output = [ip_header, f"{flag} **Country:** {geo.get('country', 'N/A')} ({geo.get('countryCode', 'N/A')})", f"**Region:** {geo.get('regionName', 'N/A')}", f"**City:** {geo.get('city', 'N/A')}", f"**ISP:** {geo.get('isp', 'N/A')}", f"**Organization:** {geo.get('org', 'N/A')}"]
                 vpn_provider = self.bot.ip_handler.detect_vpn_provider(geo.get("isp", ""), geo.get("org", ""))
                 if vpn_provider: output.append(f"**VPN Provider:** {vpn_provider}")
@@ -864,26 +946,28 @@ class UserCommands:
                 total_pages = (len(ips) + per_page - 1) // per_page
                 if not page_ips:
                     return await self.bot.bot_send(message.channel, content="❌ Page not found")
-                output = [f"**Cached IPs (Page {page}/{total_pages}):**"]
-                for ip in page_ips:
-                    output.append(f"• {self.bot.ip_handler.format_ip_with_geo(ip)}")
-                if total_pages > page:
-                    output.append(f"\nUse `{p}ip db list {page + 1}` for next page.")
-                output.append("\n*liforra.de | Liforras Utility bot*")
-                await self.bot.bot_send(message.channel, content="\n".join(output))
+                format_line = self.bot.ip_handler.format_ip_list_line
+                body = "\n".join(format_line(ip) for ip in page_ips)
+                next_hint = f"\n\nUse `{p}ip db list {page + 1}` for next page." if total_pages > page else ""
+                await self.bot.bot_send(
+                    message.channel,
+                    content=f"**Cached IPs (Page {page}/{total_pages}):**\n{body}{next_hint}\n\n*liforra.de | Liforras Utility bot*",
+                )
 
             elif db_subcommand == "search":
                 if len(args) < 3:
                     return await self.bot.bot_send(message.channel, content=f"Usage: `{p}ip db search <term>`")
                 search_term = " ".join(args[2:]).lower()
-                results = [f"• {self.bot.ip_handler.format_ip_with_geo(ip)}" for ip, geo in self.bot.ip_handler.ip_geo_data.items() if search_term in " ".join(filter(None, [geo.get(k) for k in ["country", "regionName", "city", "isp", "org"]])).lower()]
+                results = [ip for ip, geo in self.bot.ip_handler.ip_geo_data.items() if search_term in " ".join(filter(None, [geo.get(k) for k in ["country", "regionName", "city", "isp", "org"]])).lower()]
                 if not results:
                     return await self.bot.bot_send(message.channel, content=f"❌ No IPs found matching '{search_term}'")
-                output = [f"**Search Results for '{search_term}':**"] + results[:25]
-                if len(results) > 25:
-                    output.append(f"\n*Showing 25 of {len(results)} results*")
-                output.append("\n*liforra.de | Liforras Utility bot*")
-                await self.bot.bot_send(message.channel, content="\n".join(output))
+                format_line = self.bot.ip_handler.format_ip_list_line
+                body = "\n".join(format_line(ip) for ip in results[:25])
+                footer = f"\n\n*Showing 25 of {len(results)} results*" if len(results) > 25 else ""
+                await self.bot.bot_send(
+                    message.channel,
+                    content=f"**Search Results for '{search_term}':**\n{body}{footer}\n\n*liforra.de | Liforras Utility bot*",
+                )
 
             elif db_subcommand == "refresh":
                 await self.bot.bot_send(message.channel, "⚙️ Refreshing all IP geolocation data...")
@@ -894,7 +978,7 @@ class UserCommands:
                 from datetime import datetime
                 timestamp = datetime.now().isoformat()
                 for ip, geo_data in geo_results.items():
-                    self.bot.ip_handler.ip_geo_data[ip] = {"country": geo_data.get("country"), "countryCode": geo_data.get("countryCode"), "region": geo_data.get("region"), "regionName": geo_data.get("regionName"), "city": geo_data.get("city"), "isp": geo_data.get("isp"), "org": geo_data.get("org"), "proxy": geo_data.get("proxy", False), "hosting": geo_data.get("hosting", False), "last_updated": timestamp}
+                    self.bot.ip_handler.store_ip_geo(ip, geo_data, timestamp)
                 self.bot.ip_handler.save_ip_geo_data()
                 await self.bot.bot_send(message.channel, content=f"✅ Refreshed {len(geo_results)} IP records\n\n*liforra.de | Liforras Utility bot | Powered by ip-api.com*")
             else:
@@ -931,41 +1015,45 @@ class UserCommands:
                         content=f"❌ Could not resolve Steam username `{username}`. Try using Steam ID64 instead."
                     )
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://playerdb.co/api/player/{account_type}/{username}",
-                    headers={"User-Agent": "https://liforra.de"},
-                    timeout=10
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("code") != "player.found":
-                    return await self.bot.bot_send(
-                        message.channel,
-                        content=f"❌ {account_type.capitalize()} account `{username}` not found"
+            async def fetch_player():
+                await get_bucket("playerdb.co").acquire()
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(
+                        f"https://playerdb.co/api/player/{account_type}/{username}",
+                        headers={"User-Agent": "https://liforra.de"},
+                        timeout=10
                     )
-                
-                player = data["data"]["player"]
-                embed = None
-                
-                if account_type == "minecraft":
-                    embed = self._format_minecraft_info(player, self.bot.discord)
-                elif account_type == "steam":
-                    embed = self._format_steam_info(player, self.bot.discord)
-                elif account_type == "xbox":
-                    embed = self._format_xbox_info(player, self.bot.discord)
-
-                if embed:
-                    if self.bot.token_type == "user":
-                        text_output = [f"**{embed.title}**"]
-                        if embed.description: text_output.append(embed.description)
-                        for field in embed.fields: text_output.append(f"\n**{field.name}**\n{field.value}")
-                        if embed.image and embed.image.url: text_output.append(f"\nImage: {embed.image.url}")
-                        if embed.footer and embed.footer.text: text_output.append(f"\n*{embed.footer.text}*")
-                        await self.bot.bot_send(message.channel, content="\n".join(text_output))
-                    else:
-                        await message.channel.send(embed=embed)
+                    response.raise_for_status()
+                    return orjson.loads(response.content)
+
+            data = await self._cached_get(("playerdb", account_type, username.lower()), fetch_player)
+
+            if data.get("code") != "player.found":
+                return await self.bot.bot_send(
+                    message.channel,
+                    content=f"❌ {account_type.capitalize()} account `{username}` not found"
+                )
+
+            player = data["data"]["player"]
+            embed = None
+
+            if account_type == "minecraft":
+                embed = self._format_minecraft_info(player, self.bot.discord)
+            elif account_type == "steam":
+                embed = self._format_steam_info(player, self.bot.discord)
+            elif account_type == "xbox":
+                embed = self._format_xbox_info(player, self.bot.discord)
+
+            if embed:
+                if self.bot.token_type == "user":
+                    text_output = [f"**{embed.title}**"]
+                    if embed.description: text_output.append(embed.description)
+                    for field in embed.fields: text_output.append(f"\n**{field.name}**\n{field.value}")
+                    if embed.image and embed.image.url: text_output.append(f"\nImage: {embed.image.url}")
+                    if embed.footer and embed.footer.text: text_output.append(f"\n*{embed.footer.text}*")
+                    await self.bot.bot_send(message.channel, content="\n".join(text_output))
+                else:
+                    await message.channel.send(embed=embed)
 
         except httpx.HTTPStatusError as e:
             if account_type == "xbox" and 500 <= e.response.status_code < 600:
@@ -978,33 +1066,36 @@ class UserCommands:
                     message.channel,
                     content=f"❌ API Error: {e.response.status_code}"
                 )
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+        except Exception:
+            await self._report_error(message.channel, "An unexpected error occurred")
 
     async def _resolve_steam_vanity_url(self, vanity_url: str) -> Optional[str]:
         """Resolves a Steam vanity URL to a Steam ID64."""
         if not self.bot.config.steam_api_key:
             return None
         
-        try:
+        async def fetch_vanity():
+            await get_bucket("api.steampowered.com").acquire()
             async with httpx.AsyncClient() as client:
                 response = await client.get(
                     "http://api.steampowered.com/ISteamUser/ResolveVanityURL/v0001/",
                     params={"key": self.bot.config.steam_api_key, "vanityurl": vanity_url},
                     timeout=10
                 )
-                data = response.json()
-                
-                if data.get("response", {}).get("success") == 1:
-                    return data["response"]["steamid"]
+                return orjson.loads(response.content)
+
+        try:
+            # Vanity URLs rarely change hands, so keep resolutions around longer than player data
+            data = await self._cached_get(("steam_vanity", vanity_url.lower()), fetch_vanity, ttl=3600.0)
+            if data.get("response", {}).get("success") == 1:
+                return data["response"]["steamid"]
         except Exception as e:
             print(f"[Steam] Error resolving vanity URL: {e}")
         return None
 
     def _format_minecraft_info(self, player: dict, discord_module) -> discord.Embed:
         """Formats Minecraft player information into an embed."""
+        meta = player.get('meta') or {}
         embed = discord_module.Embed(
             title=f"🎮 Minecraft Profile: {player['username']}", 
             url=f"https://namemc.com/profile/{player['username']}", 
@@ -1023,7 +1114,7 @@ class UserCommands:
         
         embed.set_image(url=f"https://crafatar.com/renders/body/{player['raw_id']}?overlay=true&size=512")
         
-        if cached_at := player.get('meta', {}).get('cached_at'):
+        if cached_at := meta.get('cached_at'):
             embed.set_footer(text="Powered by PlayerDB • Data cached")
             from datetime import datetime
             embed.timestamp = datetime.fromtimestamp(cached_at)
@@ -1034,7 +1125,7 @@ class UserCommands:
 
     def _format_steam_info(self, player: dict, discord_module) -> discord.Embed:
         """Formats Steam player information into an embed."""
-        meta = player.get('meta', {})
+        meta = player.get('meta') or {}
         embed = discord_module.Embed(
             title=f"🎮 Steam Profile: {player.get('username', 'Unknown')}",
             url=meta.get('profileurl', 'https://steamcommunity.com'),
@@ -1043,19 +1134,17 @@ class UserCommands:
         if player.get('avatar'):
             embed.set_thumbnail(url=player['avatar'])
         
-        if meta.get('steamid'):
-            embed.add_field(name="Steam ID64", value=f"`{meta.get('steamid')}`", inline=True)
-        if meta.get('steam3id'):
-            embed.add_field(name="Steam3 ID", value=f"`{meta.get('steam3id')}`", inline=True)
+        if steamid := meta.get('steamid'):
+            embed.add_field(name="Steam ID64", value=f"`{steamid}`", inline=True)
+        if steam3id := meta.get('steam3id'):
+            embed.add_field(name="Steam3 ID", value=f"`{steam3id}`", inline=True)
         
-        if meta.get('communityvisibilitystate'):
+        if visibility := meta.get('communityvisibilitystate'):
             visibility_map = {3: "Public", 2: "Friends Only", 1: "Private"}
-            embed.add_field(name="Profile", value=visibility_map.get(meta.get('communityvisibilitystate'), "Unknown"), inline=True)
+            embed.add_field(name="Profile", value=visibility_map.get(visibility, "Unknown"), inline=True)
         
-        if meta.get('timecreated'):
-            from datetime import datetime
-            created_ts = int(meta.get('timecreated'))
-            embed.add_field(name="Account Created", value=f"<t:{created_ts}:D>", inline=True)
+        if time_created := meta.get('timecreated'):
+            embed.add_field(name="Account Created", value=f"<t:{int(time_created)}:D>", inline=True)
 
         country_code = meta.get('loccountrycode')
         state_code = meta.get('locstatecode')
@@ -1070,10 +1159,10 @@ class UserCommands:
             else:
                  embed.add_field(name="🌍 Country", value=country_code, inline=True)
 
-        if meta.get('realname'):
-            embed.add_field(name="Real Name", value=meta.get('realname'), inline=True)
+        if realname := meta.get('realname'):
+            embed.add_field(name="Real Name", value=realname, inline=True)
 
-        if cached_at := player.get('meta', {}).get('cached_at'):
+        if cached_at := meta.get('cached_at'):
             embed.set_footer(text="Powered by PlayerDB • Data cached")
             from datetime import datetime
             embed.timestamp = datetime.fromtimestamp(cached_at)
@@ -1084,7 +1173,7 @@ class UserCommands:
 
     def _format_xbox_info(self, player: dict, discord_module) -> discord.Embed:
         """Formats Xbox player information into an embed."""
-        meta = player.get('meta', {})
+        meta = player.get('meta') or {}
         embed = discord_module.Embed(
             title=f"🎮 Xbox Profile: {player.get('username', 'Unknown')}", 
             color=0x107C10
@@ -1117,7 +1206,7 @@ class UserCommands:
                 bio = bio[:197] + "..."
             embed.add_field(name="Bio", value=bio, inline=False)
             
-        if cached_at := player.get('meta', {}).get('cached_at'):
+        if cached_at := meta.get('cached_at'):
             embed.set_footer(text="Powered by PlayerDB • Data cached")
             from datetime import datetime
             embed.timestamp = datetime.fromtimestamp(cached_at)
@@ -1145,7 +1234,7 @@ class UserCommands:
                     timeout=15
                 )
                 response.raise_for_status()
-                data = response.json()
+                data = orjson.loads(response.content)
                 
                 if not data.get("history"):
                     return await self.bot.bot_send(
@@ -1181,10 +1270,8 @@ class UserCommands:
                 
         except httpx.HTTPStatusError as e:
             await self.bot.bot_send(message.channel, content=f"❌ API Error: {e.response.status_code}")
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+        except Exception:
+            await self._report_error(message.channel, "An unexpected error occurred")
 
     async def command_phone(self, message: discord.Message, args: List[str]):
         """Looks up phone number information."""
@@ -1214,51 +1301,53 @@ class UserCommands:
             phone_number = '+' + phone_number
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://api.numlookupapi.com/v1/validate/{phone_number}",
-                    headers={"apikey": self.bot.config.numlookup_api_key},
-                    timeout=10
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if not data.get("valid"):
-                    return await self.bot.bot_send(
-                        message.channel,
-                        content=f"❌ Invalid phone number: `{phone_number}`"
+            async def fetch_phone():
+                await get_bucket("api.numlookupapi.com").acquire()
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(
+                        f"https://api.numlookupapi.com/v1/validate/{phone_number}",
+                        headers={"apikey": self.bot.config.numlookup_api_key},
+                        timeout=10
                     )
-                
-                # Store the lookup in database
-                self.bot.phone_handler.store_phone_lookup(
-                    discord_user_id=str(message.author.id),
-                    phone_number=phone_number,
-                    lookup_data=data
+                    response.raise_for_status()
+                    return orjson.loads(response.content)
+
+            data = await self._cached_get(("numlookup", phone_number), fetch_phone)
+
+            if not data.get("valid"):
+                return await self.bot.bot_send(
+                    message.channel,
+                    content=f"❌ Invalid phone number: `{phone_number}`"
                 )
-                
-                flag = COUNTRY_FLAGS.get(data.get("country_code", ""), "🌐")
-                output = [
-                    f"📱 **Phone Number Information**", "",
-                    f"**Number:** `{data.get('number', 'N/A')}`",
-                    f"**Local Format:** `{data.get('local_format', 'N/A')}`",
-                    f"**International Format:** `{data.get('international_format', 'N/A')}`", "",
-                    f"{flag} **Country:** {data.get('country_name', 'N/A')} ({data.get('country_code', 'N/A')})",
-                    f"**Country Prefix:** {data.get('country_prefix', 'N/A')}", "",
-                    f"**📍 Location:** {data.get('location', 'N/A') or 'Not available'}",
-                    f"**📡Carrier:** {data.get('carrier', 'N/A')}",
-                    f"**📞 Line Type:** {data.get('line_type', 'N/A').title()}", "",
-                    f"*liforra.de | Liforras Utility bot | Powered by NumLookupAPI*"
-                ]
-                await self.bot.bot_send(message.channel, content="\n".join(output))
+
+            # Store the lookup in database
+            self.bot.phone_handler.store_phone_lookup(
+                discord_user_id=str(message.author.id),
+                phone_number=phone_number,
+                lookup_data=data
+            )
+
+            flag = COUNTRY_FLAGS.get(data.get("country_code", ""), "🌐")
+            output = [
+                f"📱 **Phone Number Information**", "",
+                f"**Number:** `{data.get('number', 'N/A')}`",
+                f"**Local Format:** `{data.get('local_format', 'N/A')}`",
+                f"**International Format:** `{data.get('international_format', 'N/A')}`", "",
+                f"{flag} **Country:** {data.get('country_name', 'N/A')} ({data.get('country_code', 'N/A')})",
+                f"**Country Prefix:** {data.get('country_prefix', 'N/A')}", "",
+                f"**📍 Location:** {data.get('location', 'N/A') or 'Not available'}",
+                f"**📡Carrier:** {data.get('carrier', 'N/A')}",
+                f"**📞 Line Type:** {data.get('line_type', 'N/A').title()}", "",
+                f"*liforra.de | Liforras Utility bot | Powered by NumLookupAPI*"
+            ]
+            await self.bot.bot_send(message.channel, content="\n".join(output))
                 
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 401: await self.bot.bot_send(message.channel, "❌ Invalid NumLookupAPI key.")
             elif e.response.status_code == 429: await self.bot.bot_send(message.channel, "⏱️ API rate limit exceeded. Try again later.")
             else: await self.bot.bot_send(message.channel, content=f"❌ API Error: {e.response.status_code}")
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+        except Exception:
+            await self._report_error(message.channel, "An unexpected error occurred")
 
     async def command_shodan(self, message: discord.Message, args: List[str]):
         """Shodan search and host information."""
@@ -1280,7 +1369,7 @@ class UserCommands:
             )
         
         subcommand = args[0].lower()
-        is_admin = str(message.author.id) in self.bot.config.admin_ids
+        is_admin = message.author.id in self.bot.config.admin_ids
         
         if subcommand == "host":
             if len(args) < 2: return await self.bot.bot_send(message.channel, content=f"Usage: `{p}shodan host <ip>`")
@@ -1296,88 +1385,99 @@ class UserCommands:
         else:
             await self.bot.bot_send(message.channel, content=f"❌ Unknown subcommand. Use `{p}help shodan` for usage.")
 
+    async def _fetch_shodan_host(self, ip: str) -> Dict:
+        """Returns Shodan's host record for `ip`, shared by the prefix and slash commands."""
+        async def fetch_host():
+            await get_bucket("api.shodan.io").acquire()
+            response = await self.bot.shodan_client.get(f"/shodan/host/{ip}", params={"key": self.bot.config.shodan_api_key})
+            response.raise_for_status()
+            return orjson.loads(response.content)
+
+        return await self._cached_get(("shodan_host", ip), fetch_host)
+
     async def _shodan_host(self, message: discord.Message, ip: str):
         """Gets detailed information about a host from Shodan."""
         
-        if not is_valid_ip(ip):
+        is_v6 = is_valid_ipv6(ip)
+        if not (is_v6 or is_valid_ipv4(ip)):
             return await self.bot.bot_send(message.channel, content="❌ Invalid IP address format.")
         
         await self.bot.bot_send(message.channel, f"⚙️ Fetching Shodan data for `{ip}`...")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://api.shodan.io/shodan/host/{ip}", params={"key": self.bot.config.shodan_api_key}, timeout=20)
-                response.raise_for_status()
-                data = response.json()
-                
-                flag = COUNTRY_FLAGS.get(data.get("country_code", ""), "🌐")
-                ip_header = f"**Shodan Host Information for [{ip}](<https://www.shodan.io/host/{ip}>):**" if not is_valid_ipv6(ip) else f"**Shodan Host Information for `{ip}`:**"
-                
-                output = [ip_header, f"{flag} **Country:** {data.get('country_name', 'N/A')}", f"**Organization:** {data.get('org', 'N/A')}", f"**ISP:** {data.get('isp', 'N/A')}", f"**ASN:** {data.get('asn', 'N/A')}", f"**Hostnames:** {', '.join(data.get('hostnames', [])) or 'None'}", "", f"**Open Ports ({len(data.get('ports', []))}):** {', '.join(map(str, data.get('ports', []))) or 'None'}", f"**Last Update:** {data.get('last_update', 'N/A')[:10]}"]
-                
-                if vulns := data.get('vulns', []):
-                    vuln_list = ', '.join(vulns[:10]) + (f" (+{len(vulns) - 10} more)" if len(vulns) > 10 else "")
-                    output.append(f"\n**⚠️ Vulnerabilities ({len(vulns)}):** {vuln_list}")
-                
-                if tags := data.get('tags', []):
-                    output.append(f"**🏷️ Tags:** {', '.join(tags)}")
-                
-                output.append("\n*liforra.de | Liforras Utility bot | Powered by Shodan*")
-                
-                await self.bot.bot_send(message.channel, content="\n".join(output))
+            data = await self._fetch_shodan_host(ip)
+
+            flag = COUNTRY_FLAGS.get(data.get("country_code", ""), "🌐")
+            ip_header = f"**Shodan Host Information for [{ip}](<https://www.shodan.io/host/{ip}>):**" if not is_v6 else f"**Shodan Host Information for `{ip}`:**"
+
+            output = [ip_header, f"{flag} **Country:** {data.get('country_name', 'N/A')}", f"**Organization:** {data.get('org', 'N/A')}", f"**ISP:** {data.get('isp', 'N/A')}", f"**ASN:** {data.get('asn', 'N/A')}", f"**Hostnames:** {', '.join(data.get('hostnames', [])) or 'None'}", "", f"**Open Ports ({len(data.get('ports', []))}):** {', '.join(map(str, data.get('ports', []))) or 'None'}", f"**Last Update:** {data.get('last_update', 'N/A')[:10]}"]
+
+            if vulns := data.get('vulns', []):
+                vuln_list = ', '.join(vulns[:10]) + (f" (+{len(vulns) - 10} more)" if len(vulns) > 10 else "")
+                output.append(f"\n**⚠️ Vulnerabilities ({len(vulns)}):** {vuln_list}")
+
+            if tags := data.get('tags', []):
+                output.append(f"**🏷️ Tags:** {', '.join(tags)}")
+
+            output.append("\n*liforra.de | Liforras Utility bot | Powered by Shodan*")
+
+            await self.bot.bot_send(message.channel, content="\n".join(output))
                 
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 401: await self.bot.bot_send(message.channel, "❌ Invalid Shodan API key.")
             elif e.response.status_code == 404: await self.bot.bot_send(message.channel, f"❌ No information available for `{ip}` in Shodan.")
             else: await self.bot.bot_send(message.channel, content=f"❌ API Error: {e.response.status_code}")
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+        except Exception:
+            await self._report_error(message.channel, "An unexpected error occurred")
 
     async def _shodan_search(self, message: discord.Message, query: str):
         """Searches Shodan (admin only)."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get("https://api.shodan.io/shodan/host/search", params={"key": self.bot.config.shodan_api_key, "query": query}, timeout=20)
+            async def fetch_search():
+                await get_bucket("api.shodan.io").acquire()
+                response = await self.bot.shodan_client.get("/shodan/host/search", params={"key": self.bot.config.shodan_api_key, "query": query})
                 response.raise_for_status()
-                data = response.json()
-                
-                total, matches = data.get('total', 0), data.get('matches', [])[:5]
-                output = [f"🔍 **Shodan Search Results for `{query}`:**", f"**Total Results:** {total:,}", ""]
-                
-                for idx, match in enumerate(matches, 1):
-                    output.append(f"**{idx}. {match.get('ip_str', 'N/A')}:{match.get('port', 'N/A')}**")
-                    output.append(f"   Organization: {match.get('org', 'N/A')}")
-                    output.append(f"   Hostnames: {', '.join(match.get('hostnames', [])) or 'None'}")
-                    output.append("")
-                
-                if total > 5:
-                    output.append(f"*Showing 5 of {total:,} results. View all at https://www.shodan.io/search?query={query.replace(' ', '+')}*")
-                
-                output.append("\n*liforra.de | Liforras Utility bot | Powered by Shodan*")
-                await self.bot.bot_send(message.channel, content="\n".join(output))
-                
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+                data = orjson.loads(response.content)
+                # Only the first five matches are ever shown, so keep the cache entry small
+                return {"total": data.get('total', 0), "matches": data.get('matches', [])[:5]}
+
+            data = await self._cached_get(("shodan_search", query), fetch_search, ttl=600.0)
+            
+            total, matches = data['total'], data['matches']
+            output = [f"🔍 **Shodan Search Results for `{query}`:**", f"**Total Results:** {total:,}", ""]
+            
+            for idx, match in enumerate(matches, 1):
+                output.append(f"**{idx}. {match.get('ip_str', 'N/A')}:{match.get('port', 'N/A')}**")
+                output.append(f"   Organization: {match.get('org', 'N/A')}")
+                output.append(f"   Hostnames: {', '.join(match.get('hostnames', [])) or 'None'}")
+                output.append("")
+            
+            if total > 5:
+                output.append(f"*Showing 5 of {total:,} results. View all at https://www.shodan.io/search?query={quote_plus(query)}*")
+            
+            output.append("\n*liforra.de | Liforras Utility bot | Powered by Shodan*")
+            await self.bot.bot_send(message.channel, content="\n".join(output))
+            
+        except Exception:
+            await self._report_error(message.channel, "An unexpected error occurred")
 
     async def _shodan_count(self, message: discord.Message, query: str):
         """Counts Shodan search results (admin only)."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get("https://api.shodan.io/shodan/host/count", params={"key": self.bot.config.shodan_api_key, "query": query}, timeout=20)
+            async def fetch_count():
+                await get_bucket("api.shodan.io").acquire()
+                response = await self.bot.shodan_client.get("/shodan/host/count", params={"key": self.bot.config.shodan_api_key, "query": query})
                 response.raise_for_status()
-                data = response.json()
-                total = data.get('total', 0)
-                output = [f"📊 **Shodan Count for `{query}`:**", f"**Total Results:** {total:,}", "", "*liforra.de | Liforras Utility bot | Powered by Shodan*"]
-                await self.bot.bot_send(message.channel, content="\n".join(output))
-                
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **An unexpected error occurred:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+                return orjson.loads(response.content).get('total', 0)
+
+            total = await self._cached_get(("shodan_count", query), fetch_count, ttl=600.0)
+            await self.bot.bot_send(
+                message.channel,
+                content=f"📊 **Shodan Count for `{query}`:**\n**Total Results:** {total:,}\n\n*liforra.de | Liforras Utility bot | Powered by Shodan*",
+            )
+            
+        except Exception:
+            await self._report_error(message.channel, "An unexpected error occurred")
 
     async def command_alts(self, message: discord.Message, args: List[str]):
         """Alts database lookup (user-facing, IPs hidden by default)."""
@@ -1393,12 +1493,11 @@ class UserCommands:
 
         if subcommand == "stats":
             total_users = len(self.bot.alts_handler.alts_data)
-            all_ips = set().union(*(data.get("ips", set()) for data in self.bot.alts_handler.alts_data.values()))
-            stats = f"**Alts DB Stats:**\n- Users: {total_users}\n- Unique IPs: {len(all_ips)}\n- Cached IP Geo Data: {len(self.bot.ip_handler.ip_geo_data)}\n\n*liforra.de | Liforras Utility bot*"
+            stats = f"**Alts DB Stats:**\n- Users: {total_users}\n- Unique IPs: {len(self.bot.alts_handler.all_ips)}\n- Cached IP Geo Data: {len(self.bot.ip_handler.ip_geo_data)}\n\n*liforra.de | Liforras Utility bot*"
             return await self.bot.bot_send(message.channel, content=stats)
 
         elif subcommand == "list":
-            users = sorted([user for user in self.bot.alts_handler.alts_data.keys() if not (is_valid_ipv4(user) or is_valid_ipv6(user))])
+            users = self.bot.alts_handler.sorted_usernames
             page = int(args[1]) if len(args) > 1 and args[1].isdigit() else 1
             per_page = 20
             start = (page - 1) * per_page
@@ -1412,7 +1511,7 @@ class UserCommands:
             for user in page_users:
                 data = self.bot.alts_handler.alts_data[user]
                 formatted_user_name = format_alt_name(user)
-                output.append(f"• {formatted_user_name} - {len(data.get('alts', []))} alts, {len(data.get('ips', []))} IPs")
+                output.append(f"• {formatted_user_name} - {len(data.alts)} alts, {len(data.ips)} IPs")
             if total_pages > page:
                 output.append(f"\nUse `{p}alts list {page + 1}` for next page.")
             output.append("\n*liforra.de | Liforras Utility bot*")
@@ -1421,41 +1520,39 @@ class UserCommands:
         else:
             search_term = args[0]
             found_user = None
-            lowercase_map = {k.lower(): k for k in self.bot.alts_handler.alts_data.keys()}
-
-            for candidate in [search_term, f".{search_term}", f"...{search_term}"]:
-                if candidate.lower() in lowercase_map:
-                    found_user = lowercase_map[candidate.lower()]
+            for candidate in (search_term, f".{search_term}", f"...{search_term}"):
+                if found_user := self.bot.alts_handler.find_user(candidate):
                     break
 
             if not found_user:
                 return await self.bot.bot_send(message.channel, f"❌ No data for `{search_term}`")
 
             data = self.bot.alts_handler.alts_data[found_user]
-            alts = sorted(list(data.get("alts", set())))
-            ips = sorted(list(data.get("ips", set())))
-            is_admin = str(message.author.id) in self.bot.config.admin_ids
-            country_counts, has_used_vpn = {}, False
+            alts = sorted(data.alts)
+            ips = sorted(data.ips)
+            is_admin = message.author.id in self.bot.config.admin_ids
+            country_counts, has_used_vpn = defaultdict(float), False
+            # Flag of the first IP seen for each country, used for the likely location
+            country_reps = {}
+            ip_geo_data = self.bot.ip_handler.ip_geo_data
             
             for ip in ips:
-                if ip in self.bot.ip_handler.ip_geo_data:
-                    geo = self.bot.ip_handler.ip_geo_data[ip]
-                    vpn_provider = self.bot.ip_handler.detect_vpn_provider(geo.get("isp", ""), geo.get("org", ""))
-                    is_vpn = vpn_provider or geo.get("proxy") or geo.get("hosting")
-                    if is_vpn: has_used_vpn = True
-                    else:
-                        country, country_code = geo.get("country"), geo.get("countryCode")
-                        if country and country_code:
-                            weight = 0.3 if country_code == "US" else 1.0
-                            country_counts[country] = country_counts.get(country, 0) + weight
+                geo = ip_geo_data.get(ip)
+                if geo is None:
+                    continue
+                country, country_code = geo.get("country"), geo.get("countryCode")
+                country_reps.setdefault(country, geo["flag"])
+                vpn_provider = self.bot.ip_handler.detect_vpn_provider(geo.get("isp", ""), geo.get("org", ""))
+                is_vpn = vpn_provider or geo.get("proxy") or geo.get("hosting")
+                if is_vpn: has_used_vpn = True
+                elif country and country_code:
+                    weight = 0.3 if country_code == "US" else 1.0
+                    country_counts[country] += weight
             
             likely_location = None
             if country_counts:
                 likely_location_name = max(country_counts, key=country_counts.get)
-                for ip in ips:
-                    if ip in self.bot.ip_handler.ip_geo_data and self.bot.ip_handler.ip_geo_data[ip].get("country") == likely_location_name:
-                        likely_location = f"{COUNTRY_FLAGS.get(self.bot.ip_handler.ip_geo_data[ip].get('countryCode', ''), '🌐')} {likely_location_name}"
-                        break
+                likely_location = f"{country_reps[likely_location_name]} {likely_location_name}"
 
             formatted_found_user = format_alt_name(found_user)
             output = [f"**Alts data for {formatted_found_user}:**"]
@@ -1469,12 +1566,13 @@ class UserCommands:
             if ips:
                 if is_admin:
                     output.append(f"\n**IPs ({len(ips)}):**")
-                    for ip in ips: output.append(f"→ {self.bot.ip_handler.format_ip_with_geo(ip)}")
+                    format_ip = self.bot.ip_handler.format_ip_with_geo
+                    output.extend([f"→ {format_ip(ip)}" for ip in ips])
                 else:
                     output.append(f"\n**IPs:** {len(ips)} on record *(use `/alts {search_term} _ip:True` to view - admin only)*")
-            output.append(f"\n*First seen: {data.get('first_seen', 'N/A')[:10]} | Last updated: {data.get('last_updated', 'N/A')[:10]}*")
+            output.append(f"\n*First seen: {data.first_seen[:10]} | Last updated: {data.last_updated[:10]}*")
             output.append("\n*liforra.de | Liforras Utility bot*")
-            await self.bot.bot_send(message.channel, content="\n".join(output))
+            await self.bot.bot_send_long(message.channel, "\n".join(output), filename="alts.txt")
 
     async def command_stats(self, message: discord.Message, args: List[str]):
         """Displays word usage statistics from the database."""
@@ -1505,6 +1603,19 @@ class UserCommands:
         def clamp_limit(value: int) -> int:
             return max(1, min(max_limit, value))
 
+        def parse_scope_args(tokens: List[str]) -> Tuple[Optional[str], int]:
+            scope, parsed_limit = None, limit
+            for token in tokens:
+                if token.isdigit():
+                    parsed_limit = clamp_limit(int(token))
+                    continue
+                lowered = token.lower()
+                if lowered in _SCOPE_GLOBAL:
+                    scope = "global"
+                elif lowered in _SCOPE_GUILD:
+                    scope = "guild"
+            return scope, parsed_limit
+
         async def send_entries(title: str, entries: List[Dict[str, int]]):
             if not entries:
                 await self.bot.bot_send(message.channel, content=f"❌ No statistics available for {title}.")
@@ -1540,7 +1651,7 @@ class UserCommands:
             if len(args) < 2:
                 return await self.bot.bot_send(message.channel, content=usage)
             target_token = args[1]
-            match = re.match(r"<@!?([0-9]+)>", target_token)
+            match = _MENTION_RE.match(target_token)
             if match:
                 user_id = int(match.group(1))
             elif target_token.isdigit():
@@ -1548,14 +1659,7 @@ class UserCommands:
             else:
                 return await self.bot.bot_send(message.channel, content="❌ Please specify a user mention or ID.")
 
-            scope = None
-            for token in args[2:]:
-                if token.isdigit():
-                    limit = clamp_limit(int(token))
-                elif token.lower() in {"global", "overall"}:
-                    scope = "global"
-                elif token.lower() in {"guild", "server"}:
-                    scope = "guild"
+            scope, limit = parse_scope_args(args[2:])
 
             member = None
             display_name = f"<@{user_id}>"
@@ -1580,14 +1684,7 @@ class UserCommands:
             if len(args) < 2:
                 return await self.bot.bot_send(message.channel, content=usage)
             word = args[1].lower()
-            scope = None
-            for token in args[2:]:
-                if token.isdigit():
-                    limit = clamp_limit(int(token))
-                elif token.lower() in {"global", "overall"}:
-                    scope = "global"
-                elif token.lower() in {"guild", "server"}:
-                    scope = "guild"
+            scope, limit = parse_scope_args(args[2:])
 
             guild_id = message.guild.id if scope == "guild" or (scope is None and message.guild) else None
             entries = await handler.get_word_usage_per_user(word, limit, guild_id)
@@ -1595,6 +1692,7 @@ class UserCommands:
                 return await self.bot.bot_send(message.channel, content=f"❌ No usage data found for `{word}`.")
 
             lines = [f"**Usage of `{word}`{' in ' + message.guild.name if guild_id else ''}:**"]
+            guild_names = {g.id: g.name for g in self.bot.client.guilds} if guild_id is None else {}
             for idx, row in enumerate(entries, start=1):
                 user_display = f"<@{row['user_id']}>"
                 if message.guild and row['user_id'] == message.author.id:
@@ -1607,14 +1705,10 @@ class UserCommands:
                     if not gid:
                         guild_info = " (DMs)"
                     else:
-                        guild = self.bot.client.get_guild(gid)
-                        if guild:
-                            guild_info = f" ({guild.name})"
-                        else:
-                            guild_info = f" ({gid})"
+                        guild_info = f" ({guild_names.get(gid, gid)})"
                 lines.append(f"{idx}. {user_display} — {row['count']:,}{guild_info}")
             lines.append("\n*liforra.de | Liforras Utility bot*")
-            await self.bot.bot_send(message.channel, content="\n".join(lines))
+            await self.bot.bot_send_long(message.channel, "\n".join(lines), filename="stats.txt")
             return
 
         await self.bot.bot_send(message.channel, content=usage)
@@ -1628,7 +1722,7 @@ class UserCommands:
         if not message.guild:
             return await self.bot.bot_send(message.channel, content="❌ Backfill can only be used in servers.")
 
-        if str(message.author.id) not in self.bot.config.admin_ids:
+        if message.author.id not in self.bot.config.admin_ids:
             return await self.bot.bot_send(message.channel, content="❌ Only bot admins can run backfill.")
 
         days: Optional[int] = 7
@@ -1647,23 +1741,12 @@ class UserCommands:
         span_text = "all available history" if days is None else f"the last {days} day(s)"
         await self.bot.bot_send(message.channel, content=f"⚙️ Backfilling statistics for {span_text}...")
         cutoff = None if days is None else datetime.now(timezone.utc) - timedelta(days=days)
-        processed = 0
-
         try:
-            history_kwargs = {"limit": None, "oldest_first": True}
-            if cutoff:
-                history_kwargs["after"] = cutoff
-            async for entry in message.channel.history(**history_kwargs):
-                if entry.author.bot or entry.author.id == self.bot.client.user.id:
-                    continue
-                await handler.record_message(message.guild.id, entry.author.id, entry.content)
-                processed += 1
-                if processed % 200 == 0:
-                    await asyncio.sleep(0)
-        except Exception as e:
-            tb_str = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
-            error_message = f"❌ **Backfill failed:**\n```py\n{tb_str[:1800]}\n```"
-            await self.bot.bot_send(message.channel, content=error_message)
+            processed = await handler.backfill_channel(
+                message.channel, message.guild.id, self.bot.client.user.id, after=cutoff
+            )
+        except Exception:
+            await self._report_error(message.channel, "Backfill failed")
             return
 
         await self.bot.bot_send(message.channel, content=f"✅ Backfill complete. Processed {processed} messages from {span_text}.")
@@ -1742,7 +1825,7 @@ class UserCommands:
         if not args:
             user_cmds = ", ".join(f"`{cmd}`" for cmd in self.bot.user_commands.keys() if cmd != 'backfill')
             help_text = f"**Commands:** {user_cmds}\n*Type `{p}help <command>` for more info.*"
-            if str(message.author.id) in self.bot.config.admin_ids:
+            if message.author.id in self.bot.config.admin_ids:
                 admin_cmds = ", ".join(f"`{cmd}`" for cmd in self.bot.admin_commands.keys())
                 help_text += f"\n\n**Admin Commands:** {admin_cmds}"
             help_text += "\n\n**Minecraft Commands:** `search`, `random`, `playerhistory`\n\n*liforra.de | Liforras Utility bot*"
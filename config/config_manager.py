@@ -2,10 +2,17 @@
 
 import toml
 import ast
-import json
-import logging
+import copy
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Any, Dict, List, Union
+from types import MappingProxyType
+from typing import Optional, Any, Dict, Iterator, List, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
 
 # Import logger from the main bot
 from bot import logger
@@ -13,19 +20,152 @@ from bot import logger
 # Create a logger for this module
 logger = logger.getChild('config')
 
+# Shared read-only fallback for missing tables; never mutated
+_EMPTY = MappingProxyType({})
+
+# Marks a setting that is not configured at any level in the get_guild_config cache
+_MISSING = object()
+
+# First characters of the values parse_value hands to ast.literal_eval: literal
+# punctuation and digits, True/False/None, string prefixes, and comments/continuations
+_LITERAL_STARTS = frozenset("[({'\"-+.0123456789TFNbBrRuU#\\")
+# What ast.literal_eval can raise on malformed, oversized or deeply nested input
+_LITERAL_EVAL_ERRORS = (ValueError, SyntaxError, TypeError, MemoryError, RecursionError)
+
+# Parsed TOML per file, keyed by path and reused while (mtime_ns, size) is unchanged
+_PARSE_CACHE: Dict[Path, tuple] = {}
+
+
+@lru_cache(maxsize=4096)
+def _sid(snowflake: int) -> str:
+    """str() of a Discord ID; guild/channel/user tables are keyed by these strings."""
+    return str(snowflake)
+
+
+def _intern_keys(table: Dict[str, Any]) -> Dict[str, Any]:
+    """Interns table keys so setting lookups with literal names match by identity."""
+    return {
+        sys.intern(key): _intern_keys(value) if isinstance(value, dict) else value
+        for key, value in table.items()
+    }
+
+
+def _parse_toml(path: Path) -> Dict[str, Any]:
+    """Parses a TOML file, reusing the previous parse if the file has not changed.
+
+    The returned dict is shared between callers and must not be modified.
+    """
+    st = path.stat()
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _PARSE_CACHE.get(path)
+    if cached is None or cached[0] != signature:
+        # toml is only used for writing; tomllib parses the whole file in native code
+        cached = (
+            signature,
+            _intern_keys(tomllib.loads(path.read_bytes().decode("utf-8"))),
+        )
+        _PARSE_CACHE[path] = cached
+    return cached[1]
+
+
+def _load_toml(path: Path) -> Dict[str, Any]:
+    """Returns a private copy of a TOML file, since the config commands edit config_data in place."""
+    return copy.deepcopy(_parse_toml(path))
+
+
+def _load_root_conf() -> Dict[str, Any]:
+    """Returns the shared root config.toml, parsed once for every bot instance."""
+    return _parse_toml(Path("config.toml"))
+
+
+def _flatten(
+    data: Dict[str, Any], prefix: str, censored: frozenset, out: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Flattens nested tables into {"a.b.c": value}, masking censored paths.
+
+    Empty tables are kept as {} leaves so the nested view can be rebuilt.
+    """
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if path in censored:
+            out[path] = "[CENSORED]"
+        elif isinstance(value, dict) and value:
+            _flatten(value, path, censored, out)
+        else:
+            out[path] = value
+    return out
+
 
 class ConfigManager:
+    # Config paths hidden from config get/set unless censor-config says otherwise
+    _DEFAULT_CENSOR = (
+        "general.token",
+        "general.token-file",
+        "general.admin-ids",
+        "general.alts-refresh-url",
+        "general.oauth-db-url",
+        "general.oauth-db-user",
+        "general.oauth-db-password",
+        "general.oauth-client-id",
+        "general.oauth-client-secret",
+        "general.serpapi-key",
+        "general.numlookup-api-key",
+        "general.shodan-api-key",
+        "general.steam-api-key",
+        "general.groq-api-key",
+    )
+
+    # (attribute, general.* key, default) for settings copied straight from [general]
+    _SCHEMA = (
+        ("alts_refresh_url", "alts-refresh-url", ""),
+        ("discord_status_str", "discord-status", "online"),
+        ("match_status", "match-status", False),
+        ("default_prefix", "prefix", "€"),
+        ("default_allow_commands", "allow-commands", True),
+        ("default_prevent_deleting", "prevent-deleting", True),
+        ("default_prevent_editing", "prevent-editing", True),
+        ("default_message_log", "message-log", False),
+        ("default_nodelete_download", "nodelete-download", False),
+        ("default_copyparty_url", "copyparty", ""),
+        ("default_websites", "websites", []),
+        ("default_friend_websites", "friend_websites", []),
+        ("default_allow_swears", "allow-swears", True),
+        ("default_allow_slurs", "allow-slurs", False),
+        ("default_detect_ips", "detect-ips", False),
+        ("default_clean_spigey", "clean-spigey", False),
+        ("sync_channel_id", "sync-channel", ""),
+        ("sync_mention_id", "sync-mention-id", ""),
+        ("serpapi_key", "serpapi-key", ""),
+        ("debug_tracebacks", "debug-tracebacks", False),
+        ("numlookup_api_key", "numlookup-api-key", ""),
+        ("shodan_api_key", "shodan-api-key", ""),
+        ("steam_api_key", "steam-api-key", ""),
+        ("groq_api_key", "groq-api-key", ""),
+        ("oauth_db_type", "oauth-db-type", "json"),
+        ("oauth_db_url", "oauth-db-url", "file:///home/liforra/bot-users.json"),
+        ("oauth_db_user", "oauth-db-user", None),
+        ("oauth_db_password", "oauth-db-password", None),
+        ("oauth_client_id", "oauth-client-id", None),
+        ("oauth_client_secret", "oauth-client-secret", None),
+    )
+
     def __init__(self, data_dir: Path):
         self.data_dir = data_dir
         self.config_file = data_dir / "config.toml"
-        self.config_data = {}
-        self.guild_configs = {}
+        self.config_data: Dict[str, Any] = {}
+        self._general: Dict[str, Any] = _EMPTY
+        self.guild_configs: Dict[str, Dict[str, Any]] = {}
+        self._channel_overrides: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._user_overrides: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._guild_config_cache: Dict[tuple, Any] = {}
 
         # Default values
-        self.censor_config = []
+        self.censor_config: List[str] = []
+        self._censor_set: frozenset = frozenset()
+        self._censored_flat: Optional[Dict[str, Any]] = None
         self.default_prefix = "€"
-        self.default_websites = []
-        self.default_friend_websites = []
+        self.default_websites: List[str] = []
+        self.default_friend_websites: List[str] = []
         self.default_allow_commands = True
         self.default_prevent_deleting = True
         self.default_prevent_editing = True
@@ -39,13 +179,14 @@ class ConfigManager:
         self.default_clean_spigey = False
 
         self.alts_refresh_url = ""
-        self.admin_ids = []
+        self.admin_ids: frozenset = frozenset()
         self.discord_status_str = "online"
         self.configured_online_status = None
         self.match_status = False
         self.sync_channel_id = ""
         self.sync_mention_id = ""
         self.serpapi_key = ""
+        self.debug_tracebacks = False
         
         # New API keys
         self.numlookup_api_key = ""
@@ -72,70 +213,29 @@ class ConfigManager:
         if not self.config_file.exists():
             self.create_default_config()
 
+        self._guild_config_cache.clear()
+        self._censored_flat = None
         try:
-            self.config_data = toml.load(self.config_file)
+            self.config_data = _load_toml(self.config_file)
             general = self.config_data.get("general", {})
+            self._general = general
 
             self._fix_stringy_list(general, "censor-config")
 
-            self.censor_config = general.get(
-                "censor-config",
-                [
-                    "general.token",
-                    "general.token-file",
-                    "general.admin-ids",
-                    "general.alts-refresh-url",
-                    "general.oauth-db-url",
-                    "general.oauth-db-user",
-                    "general.oauth-db-password",
-                    "general.oauth-client-id",
-                    "general.oauth-client-secret",
-                    "general.serpapi-key",
-                    "general.numlookup-api-key",
-                    "general.shodan-api-key",
-                    "general.steam-api-key",
-                    "general.groq-api-key",
-                ],
+            self.censor_config = list(
+                general.get("censor-config", self._DEFAULT_CENSOR)
+            )
+            # censor_value and iter_censored test config paths against this
+            self._censor_set = frozenset(self.censor_config)
+            for attr, key, default in self._SCHEMA:
+                setattr(self, attr, general.get(key, default))
+
+            self.admin_ids = frozenset(
+                int(id) for id in general.get("admin-ids", ()) if str(id).strip().isdigit()
             )
-            self.alts_refresh_url = general.get("alts-refresh-url", "")
-            self.admin_ids = [str(id) for id in general.get("admin-ids", [])]
-            self.discord_status_str = general.get("discord-status", "online")
-            self.match_status = general.get("match-status", False)
-            self.default_prefix = general.get("prefix", "€")
-            self.default_allow_commands = general.get("allow-commands", True)
-            self.default_prevent_deleting = general.get("prevent-deleting", True)
-            self.default_prevent_editing = general.get("prevent-editing", True)
-            self.default_message_log = general.get("message-log", False)
             self.default_attachment_log = general.get(
                 "attachment-log", general.get("image-log", False)
             )
-            self.default_nodelete_download = general.get("nodelete-download", False)
-            self.default_copyparty_url = general.get("copyparty", "")
-            self.default_websites = general.get("websites", [])
-            self.default_friend_websites = general.get("friend_websites", [])
-            self.default_allow_swears = general.get("allow-swears", True)
-            self.default_allow_slurs = general.get("allow-slurs", False)
-            self.default_detect_ips = general.get("detect-ips", False)
-            self.default_clean_spigey = general.get("clean-spigey", False)
-            self.sync_channel_id = general.get("sync-channel", "")
-            self.sync_mention_id = general.get("sync-mention-id", "")
-            self.serpapi_key = general.get("serpapi-key", "")
-            
-            # New API keys
-            self.numlookup_api_key = general.get("numlookup-api-key", "")
-            self.shodan_api_key = general.get("shodan-api-key", "")
-            self.steam_api_key = general.get("steam-api-key", "")
-            self.groq_api_key = general.get("groq-api-key", "")
-            
-            # OAuth configuration
-            self.oauth_db_type = general.get("oauth-db-type", "json")
-            self.oauth_db_url = general.get(
-                "oauth-db-url", "file:///home/liforra/bot-users.json"
-            )
-            self.oauth_db_user = general.get("oauth-db-user")
-            self.oauth_db_password = general.get("oauth-db-password")
-            self.oauth_client_id = general.get("oauth-client-id")
-            self.oauth_client_secret = general.get("oauth-client-secret")
 
             stats_db_type = general.get("stats-db-type")
             stats_db_url = general.get("stats-db-url")
@@ -151,55 +251,49 @@ class ConfigManager:
                 stats_db_password if stats_db_password not in (None, "") else self.oauth_db_password
             )
 
-            if (self.stats_db_type != "postgres" or not self.stats_db_url) and Path("config.toml").exists():
-                try:
-                    root_conf = toml.load(Path("config.toml"))
-                    root_general = root_conf.get("general", {})
-                    root_stats_type = root_general.get("stats-db-type")
-                    root_stats_url = root_general.get("stats-db-url")
-                    root_stats_user = root_general.get("stats-db-user")
-                    root_stats_password = root_general.get("stats-db-password")
-
-                    if root_stats_url:
-                        self.stats_db_type = root_stats_type or "postgres"
-                        self.stats_db_url = root_stats_url
-                        self.stats_db_user = root_stats_user if root_stats_user not in (None, "") else self.stats_db_user
-                        self.stats_db_password = root_stats_password if root_stats_password not in (None, "") else self.stats_db_password
-                    elif root_general.get("oauth-db-type") == "postgres" and root_general.get("oauth-db-url"):
-                        self.stats_db_type = "postgres"
-                        self.stats_db_url = root_general.get("oauth-db-url")
-                        self.stats_db_user = root_general.get("oauth-db-user", self.stats_db_user)
-                        self.stats_db_password = root_general.get("oauth-db-password", self.stats_db_password)
-                except Exception as e:
-                    print(f"[{self.data_dir.name}] Warning: failed to load root stats DB config: {e}")
-
-            self.guild_configs = self.config_data.get("guild", {})
+            self._apply_root_stats_db()
+
+            self._index_guild_configs()
 
             print(f"[{self.data_dir.name}] Config loaded.")
         except Exception as e:
             print(f"[{self.data_dir.name}] Error loading config: {e}")
 
+    def _apply_root_stats_db(self):
+        """Falls back to the root config.toml's stats DB when this one has no Postgres URL."""
+        if self.stats_db_type == "postgres" and self.stats_db_url:
+            return
+        try:
+            root_conf = _load_root_conf()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[{self.data_dir.name}] Warning: failed to load root stats DB config: {e}")
+            return
+
+        root_general = root_conf.get("general", _EMPTY)
+        root_stats_type = root_general.get("stats-db-type")
+        root_stats_url = root_general.get("stats-db-url")
+        root_stats_user = root_general.get("stats-db-user")
+        root_stats_password = root_general.get("stats-db-password")
+
+        if root_stats_url:
+            self.stats_db_type = root_stats_type or "postgres"
+            self.stats_db_url = root_stats_url
+            self.stats_db_user = root_stats_user if root_stats_user not in (None, "") else self.stats_db_user
+            self.stats_db_password = root_stats_password if root_stats_password not in (None, "") else self.stats_db_password
+        elif root_general.get("oauth-db-type") == "postgres" and root_general.get("oauth-db-url"):
+            self.stats_db_type = "postgres"
+            self.stats_db_url = root_general.get("oauth-db-url")
+            self.stats_db_user = root_general.get("oauth-db-user", self.stats_db_user)
+            self.stats_db_password = root_general.get("oauth-db-password", self.stats_db_password)
+
     def create_default_config(self):
         """Creates a default configuration file."""
         default_config = {
             "general": {
                 "alts-refresh-url": "",
-                "censor-config": [
-                    "general.token",
-                    "general.token-file",
-                    "general.admin-ids",
-                    "general.alts-refresh-url",
-                    "general.oauth-db-url",
-                    "general.oauth-db-user",
-                    "general.oauth-db-password",
-                    "general.oauth-client-id",
-                    "general.oauth-client-secret",
-                    "general.serpapi-key",
-                    "general.numlookup-api-key",
-                    "general.shodan-api-key",
-                    "general.steam-api-key",
-                    "general.groq-api-key",
-                ],
+                "censor-config": list(self._DEFAULT_CENSOR),
                 "discord-status": "online",
                 "match-status": False,
                 "admin-ids": [],
@@ -219,6 +313,7 @@ class ConfigManager:
                 "allow-slurs": False,
                 "detect-ips": False,
                 "clean-spigey": False,
+                "debug-tracebacks": False,
                 "serpapi-key": "",
                 "numlookup-api-key": "",
                 "shodan-api-key": "",
@@ -237,18 +332,37 @@ class ConfigManager:
             },
             "guild": {},
         }
-        with open(self.config_file, "w") as f:
-            toml.dump(default_config, f)
+        self.config_file.write_text(toml.dumps(default_config), encoding="utf-8")
         print(f"[{self.data_dir.name}] Created default config.")
 
+    def save_config(self):
+        """Writes config_data back to disk after an in-place edit."""
+        self._guild_config_cache.clear()
+        self._censored_flat = None
+        self._general = self.config_data.get("general", _EMPTY)
+        self._index_guild_configs()
+        self.config_file.write_text(toml.dumps(self.config_data), encoding="utf-8")
+
+    def _index_guild_configs(self):
+        """Indexes channel/user overrides by (guild_id, target_id) for get_guild_config."""
+        self.guild_configs = self.config_data.get("guild", {})
+        self._channel_overrides = {}
+        self._user_overrides = {}
+        for guild_id, guild_config in self.guild_configs.items():
+            for channel_id, overrides in guild_config.get("channel_overrides", _EMPTY).items():
+                self._channel_overrides[(guild_id, channel_id)] = overrides
+            for user_id, overrides in guild_config.get("user_overrides", _EMPTY).items():
+                self._user_overrides[(guild_id, user_id)] = overrides
+
     def _fix_stringy_list(self, config_dict, key):
         """Fixes lists that are stored as strings."""
         if key in config_dict and isinstance(config_dict[key], str):
             try:
-                if isinstance(ast.literal_eval(config_dict[key]), list):
-                    config_dict[key] = ast.literal_eval(config_dict[key])
-            except:
-                pass
+                parsed = ast.literal_eval(config_dict[key])
+            except _LITERAL_EVAL_ERRORS:
+                return
+            if isinstance(parsed, list):
+                config_dict[key] = parsed
 
     def get_guild_config(
         self,
@@ -259,52 +373,92 @@ class ConfigManager:
         channel_id: Optional[int] = None,
     ) -> Any:
         """Gets a config value with guild/channel/user override support."""
+        # Ids without an override resolve like None, so they share one cache entry;
+        # the cache then stays bounded by guilds x settings x configured overrides
         if guild_id is None:
-            return self.config_data.get("general", {}).get(setting, default_value)
-
-        guild_config = self.guild_configs.get(str(guild_id), {})
-        value = guild_config.get(
-            setting, self.config_data.get("general", {}).get(setting, default_value)
-        )
-
-        if (
-            channel_id
-            and (
-                ch_override := guild_config.get("channel_overrides", {})
-                .get(str(channel_id), {})
-                .get(setting)
+            user_id = channel_id = None
+        else:
+            guild_key = _sid(guild_id)
+            if user_id is not None and (guild_key, _sid(user_id)) not in self._user_overrides:
+                user_id = None
+            if channel_id is not None and (guild_key, _sid(channel_id)) not in self._channel_overrides:
+                channel_id = None
+        key = (guild_id, setting, user_id, channel_id)
+        value = self._guild_config_cache.get(key)
+        if value is None and key not in self._guild_config_cache:
+            value = self._guild_config_cache[key] = self._resolve_guild_config(
+                guild_id, setting, user_id, channel_id
             )
-            is not None
-        ):
-            value = ch_override
-
-        if (
-            user_id
-            and (
-                usr_override := guild_config.get("user_overrides", {})
-                .get(str(user_id), {})
-                .get(setting)
-            )
-            is not None
-        ):
-            value = usr_override
-
+        if value is _MISSING:
+            return default_value
+        # Callers get their own copy of mutable values, not the cached config object
+        if isinstance(value, (list, dict)):
+            return copy.copy(value)
         return value
 
+    def _resolve_guild_config(
+        self,
+        guild_id: Optional[int],
+        setting: str,
+        user_id: Optional[int],
+        channel_id: Optional[int],
+    ) -> Any:
+        """Walks general -> guild -> channel -> user settings; _MISSING if unset everywhere."""
+        if guild_id is None:
+            return self._general.get(setting, _MISSING)
+
+        guild_key = _sid(guild_id)
+        # Most specific first: user, then channel, then guild, then general
+        if user_id is not None:
+            value = self._user_overrides.get(
+                (guild_key, _sid(user_id)), _EMPTY
+            ).get(setting, _MISSING)
+            if value is not _MISSING:
+                return value
+        if channel_id is not None:
+            value = self._channel_overrides.get(
+                (guild_key, _sid(channel_id)), _EMPTY
+            ).get(setting, _MISSING)
+            if value is not _MISSING:
+                return value
+        return self.guild_configs.get(guild_key, _EMPTY).get(
+            setting, self._general.get(setting, _MISSING)
+        )
+
     def get_prefix(self, guild_id: Optional[int]) -> str:
         """Gets the command prefix for a guild."""
         return self.get_guild_config(guild_id, "prefix", self.default_prefix)
 
-    def censor_recursive(self, path_prefix: str, data: Any) -> Any:
-        """Recursively censors sensitive config values."""
-        if path_prefix in self.censor_config:
-            return "[CENSORED]"
-        if isinstance(data, dict):
-            return {
-                key: self.censor_recursive(f"{path_prefix}.{key}", value)
-                for key, value in data.items()
-            }
-        return data
+    def censor_value(self, path: str, value: Any) -> Any:
+        """Returns "[CENSORED]" if `path` is a censored config path, else `value`."""
+        return "[CENSORED]" if path in self._censor_set else value
+
+    def iter_censored(self, path_prefix: str = "") -> Iterator[Tuple[str, Any]]:
+        """Yields censored (dotted.path, value) pairs at or below path_prefix."""
+        if self._censored_flat is None:
+            self._censored_flat = _flatten(self.config_data, "", self._censor_set, {})
+        if not path_prefix:
+            yield from self._censored_flat.items()
+            return
+        nested = f"{path_prefix}."
+        for path, value in self._censored_flat.items():
+            if path == path_prefix or path.startswith(nested):
+                yield path, value
+
+    def censored_table(self, path_prefix: str) -> Any:
+        """Rebuilds the nested censored table at path_prefix from the flat view."""
+        table: Dict[str, Any] = {}
+        skip = len(path_prefix) + 1
+        for path, value in self.iter_censored(path_prefix):
+            if path == path_prefix:
+                # The table itself is censored or empty
+                return value
+            *parents, leaf = path[skip:].split(".")
+            node = table
+            for key in parents:
+                node = node.setdefault(key, {})
+            node[leaf] = value
+        return table
 
     def get_attachment_log_setting(
         self,
@@ -326,13 +480,18 @@ class ConfigManager:
 
     def parse_value(self, value_str: str) -> Any:
         """Parses a string value to its proper type."""
-        if value_str.lower() == "true":
-            return True
-        if value_str.lower() == "false":
-            return False
+        if len(value_str) in (4, 5):
+            lowered = value_str.lower()
+            if lowered == "true":
+                return True
+            if lowered == "false":
+                return False
         if value_str.isdigit():
             return int(value_str)
+        # Only literals can start like this; anything else is a plain string
+        if value_str.lstrip()[:1] not in _LITERAL_STARTS:
+            return value_str
         try:
             return ast.literal_eval(value_str)
-        except (ValueError, SyntaxError):
+        except _LITERAL_EVAL_ERRORS:
             return value_str
\ No newline at end of file
@@ -1,39 +1,313 @@
 """Alts data processing and management."""
 
+import asyncio
+import bisect
 import json
+import multiprocessing
 import re
+import time
 import httpx
+import orjson
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Set, Optional
-from datetime import datetime, timedelta
-from utils.helpers import is_valid_ipv4, is_valid_ipv6
+from sys import intern
+from typing import Dict, Iterable, List, Set, Optional, Tuple
+from datetime import datetime
+from utils.helpers import is_valid_ipv4, is_valid_ipv6, write_json_atomic
+
+
+# Asteroide "<user> has N alts:" reply layout
+_MAIN_RE = re.compile(r"^(\S+) has \d+ alts:", re.MULTILINE)
+_ALT_RE = re.compile(r"^-> (\S+)$", re.MULTILINE)
+_IP_SECTION_RE = re.compile(r"On \d+ IPs:(.*?)(?=\n\n|\Z)", re.DOTALL)
+
+
+@dataclass(slots=True)
+class AltsRecord:
+    """One tracked username: its linked accounts and IPs (including itself in `alts`)."""
+
+    alts: Set[str] = field(default_factory=set)
+    ips: Set[str] = field(default_factory=set)
+    first_seen: str = ""
+    last_updated: str = ""
+
+
+# Known Spigey names that don't follow the "..." impersonation prefix
+_SPIGEY_ALIASES = ("Spigey", "911WasMyFault", ".ASW_<h1>nigger</h1>")
+_SPIGEY_IP = "193.32.248.162"
+
+
+def _split_spigey(raw_data: Dict[str, List[str]]):
+    """Separates Spigey's groups from a raw {identifier: [users]} alts dump.
+
+    Returns (spigey_identities, spigey_ips, spigey_alts, cleaned_data), where
+    cleaned_data is raw_data minus Spigey's groups and with his names removed.
+    """
+    identities = {
+        user for users in raw_data.values() for user in users if user.startswith("...")
+    }
+    identities.update(_SPIGEY_ALIASES)
+    identities = frozenset(identities)
+
+    spigey_ips = {_SPIGEY_IP}
+    spigey_alts: Set[str] = set()
+    cleaned_data: Dict[str, List[str]] = {}
+    for identifier, users in raw_data.items():
+        # all() stops at the first outsider, which is usually the first user
+        if identifier == _SPIGEY_IP or (
+            users and all(user in identities for user in users)
+        ):
+            spigey_ips.add(identifier)
+            spigey_alts.update(users)
+        else:
+            cleaned_users = [user for user in users if user not in identities]
+            if cleaned_users:
+                cleaned_data[identifier] = cleaned_users
+    return identities, spigey_ips, spigey_alts, cleaned_data
+
+
+class _DisjointSet:
+    """Union-find over usernames with union by size and path halving."""
+
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+        self.size: Dict[str, int] = {}
+
+    def find(self, node: str) -> str:
+        parent = self.parent
+        if node not in parent:
+            parent[node] = node
+            self.size[node] = 1
+            return node
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a: str, b: str):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def components(self) -> Iterable[List[str]]:
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for node in self.parent:
+            groups[self.find(node)].append(node)
+        return groups.values()
+
+
+def _identifier_ips(identifier: str) -> Set[str]:
+    """The IP a raw alts-list key stands for, if the key is an IP at all."""
+    return {identifier} if is_valid_ipv4(identifier) or is_valid_ipv6(identifier) else set()
 
 
 class AltsHandler:
     def __init__(self, data_dir: Path, clean_spigey: bool):
         self.data_dir = data_dir
         self.alts_data_file = data_dir / "alts_data.json"
-        self.alts_data = {}
+        self.alts_data: Dict[str, AltsRecord] = {}
+        self.lowercase_index: Dict[str, str] = {}
+        self.all_ips: Set[str] = set()
+        self._sorted_usernames: Optional[List[str]] = None
+        # Set when alts_data differs from what is on disk; see save_if_dirty
+        self._dirty = False
         self.clean_spigey = clean_spigey
         self.alts_command_counter = 0
-        self._last_alts_fetch: Optional[datetime] = None
+        # time.monotonic() of the last fetch, and the ETag it came with
+        self._last_alts_fetch: Optional[float] = None
+        self._remote_etag: Optional[str] = None
         self._cached_remote_data: Optional[Dict] = None
         self.alts_override_file = data_dir / "alts_override.json"
         self.alts_overrides = self.load_alts_overrides()
 
-    def load_and_preprocess_alts_data(self):
-        """Loads and preprocesses alts data with Spigey isolation if enabled."""
+    def rebuild_indexes(self):
+        """Rebuilds the username lookup and the global IP set from scratch.
+
+        Call after editing records in place in a way that can drop IPs or usernames.
+        """
+        self.lowercase_index = {username.lower(): username for username in self.alts_data}
+        self.all_ips = set().union(*(record.ips for record in self.alts_data.values()))
+        self._sorted_usernames = None
+
+    @property
+    def sorted_usernames(self) -> List[str]:
+        """All usernames that are not IP addresses, sorted; built lazily and kept up to date."""
+        if self._sorted_usernames is None:
+            self._sorted_usernames = sorted(
+                user for user in self.alts_data if not (is_valid_ipv4(user) or is_valid_ipv6(user))
+            )
+        return self._sorted_usernames
+
+    def _index_new_user(self, user: str):
+        self.lowercase_index[user.lower()] = user
+        if self._sorted_usernames is not None and not (is_valid_ipv4(user) or is_valid_ipv6(user)):
+            bisect.insort(self._sorted_usernames, user)
+
+    def _set_record(self, user: str, record: AltsRecord):
+        """Replaces the record for `user`, indexing the name if it is new."""
+        existing = self.alts_data.get(user)
+        if existing is None:
+            self._index_new_user(user)
+            self._dirty = True
+        elif existing.alts != record.alts or existing.ips != record.ips:
+            self._dirty = True
+        self.alts_data[user] = record
+        self.all_ips.update(record.ips)
+
+    def find_user(self, name: str) -> Optional[str]:
+        """Returns the stored username matching `name` case-insensitively."""
+        return self.lowercase_index.get(name.lower())
+
+    def remove_users(self, users):
+        """Deletes the given users' records."""
+        for user in users:
+            self.alts_data.pop(user, None)
+        self.rebuild_indexes()
+
+    def _merge_groups(
+        self,
+        groups: Iterable[Tuple[Iterable[str], Set[str]]],
+        timestamp: str,
+        frozen: Set[str] = frozenset(),
+    ) -> Set[str]:
+        """Merges (users, ips) groups into the records as connected components.
+
+        Existing records are followed transitively, except those of `frozen` users.
+        Every member of a component ends up sharing one alts set and one ips set.
+        Returns the IPs of every component that was touched.
+        """
+        dsu = _DisjointSet()
+        node_ips: Dict[str, Set[str]] = defaultdict(set)
+        pending: List[str] = []
+
+        for users, ips in groups:
+            users = [intern(user) for user in users]
+            if not users:
+                continue
+            first = users[0]
+            dsu.find(first)
+            for user in users[1:]:
+                dsu.union(first, user)
+            pending.extend(users)
+            if ips:
+                node_ips[first].update(map(intern, ips))
+
+        expanded: Set[str] = set()
+        while pending:
+            user = pending.pop()
+            if user in expanded:
+                continue
+            expanded.add(user)
+            record = self.alts_data.get(user)
+            if record is None or user in frozen:
+                continue
+            if record.ips:
+                node_ips[user].update(record.ips)
+            for alt in record.alts:
+                dsu.union(user, alt)
+                if alt not in expanded:
+                    pending.append(alt)
+
+        touched_ips: Set[str] = set()
+        for members in dsu.components():
+            alts = set(members)
+            ips = set().union(*(node_ips[m] for m in members if m in node_ips))
+            for user in members:
+                record = self.alts_data.get(user)
+                if record is None:
+                    # Created with the merged sets directly, no second lookup
+                    self.alts_data[user] = AltsRecord(
+                        alts=alts, ips=ips, first_seen=timestamp, last_updated=timestamp
+                    )
+                    self._index_new_user(user)
+                    self._dirty = True
+                    continue
+                # A bumped last_updated alone is still a change worth saving
+                if not self._dirty and (
+                    record.last_updated != timestamp or record.alts != alts or record.ips != ips
+                ):
+                    self._dirty = True
+                record.alts = alts
+                record.ips = ips
+                record.last_updated = timestamp
+            self.all_ips.update(ips)
+            touched_ips.update(ips)
+        return touched_ips
+
+    def _read_alts_file(self) -> Optional[Dict]:
+        """Parses alts_data.json; None if it is missing or unreadable."""
         if not self.alts_data_file.exists():
+            return None
+        try:
+            return orjson.loads(self.alts_data_file.read_bytes())
+        except Exception as e:
+            print(f"[{self.data_dir.name}] Error loading raw alts data: {e}")
+            return None
+
+    async def load_and_preprocess_alts_data_async(self):
+        """Same as load_and_preprocess_alts_data, but reads and parses the file in a worker thread.
+
+        Merging stays on the loop, so records stored while the bot runs are never
+        overwritten by a result computed elsewhere.
+        """
+        print("[Alts Pre-processor] Loading raw data file...")
+        for _ in range(3):
+            # Unsaved records would be lost when the file's contents replace alts_data
+            self.save_if_dirty()
+            raw_data = await asyncio.to_thread(self._read_alts_file)
+            if not self._dirty:
+                break
+        else:
+            print("[Alts Pre-processor] Could not save pending alts data; keeping it instead of reloading.")
+            return
+        if raw_data is None:
             self.alts_data = {}
+            self.rebuild_indexes()
             return
+        self.load_and_preprocess_alts_data(raw_data)
 
-        print("[Alts Pre-processor] Loading raw data file...")
+    async def load_and_preprocess_alts_data_in_worker(self):
+        """Same as load_and_preprocess_alts_data, but runs it in a worker process.
+
+        Startup only: nothing else may touch alts_data or alts_data.json until it returns.
+        """
+        loop = asyncio.get_running_loop()
         try:
-            with open(self.alts_data_file, "r", encoding="utf-8") as f:
-                raw_data = json.load(f)
+            # spawn, not fork: the bot process already runs the client's threads
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                alts_data = await loop.run_in_executor(
+                    pool, _preprocess_in_worker, self.data_dir, self.clean_spigey
+                )
         except Exception as e:
-            print(f"[{self.data_dir.name}] Error loading raw alts data: {e}")
+            print(f"[Alts Pre-processor] Worker failed ({e}), processing in-process...")
+            self.load_and_preprocess_alts_data()
+            return
+
+        # The worker already applied overrides and saved the result
+        self.alts_data = alts_data
+        self.alts_overrides = self.load_alts_overrides()
+        self.rebuild_indexes()
+        self._dirty = False
+
+    def load_and_preprocess_alts_data(self, raw_data: Optional[Dict] = None):
+        """Loads and preprocesses alts data with Spigey isolation if enabled.
+
+        `raw_data` is the already-parsed file; it is read from disk when omitted.
+        """
+        if raw_data is None:
+            print("[Alts Pre-processor] Loading raw data file...")
+            raw_data = self._read_alts_file()
+        if raw_data is None:
             self.alts_data = {}
+            self.rebuild_indexes()
             return
 
         if (
@@ -44,45 +318,23 @@ class AltsHandler:
             print(
                 "[Alts Pre-processor] Data appears to be already structured. Loading normally."
             )
-            self.load_alts_data()
+            self.load_alts_data(raw_data)
             return
 
         if self.clean_spigey:
             print(
                 "[Alts Pre-processor] Raw data detected. `clean-spigey` is true. Starting Spigey data isolation process..."
             )
-            spigey_identities = {
-                user
-                for users in raw_data.values()
-                for user in users
-                if user.startswith("...")
-            }
-            spigey_identities.add("Spigey")
-            spigey_identities.add("911WasMyFault")
-            spigey_identities.add(".ASW_<h1>nigger</h1>")
-
-            true_spigey_ips = {"193.32.248.162"}
-            for identifier, users in raw_data.items():
-                user_set = set(users)
-                if user_set and user_set.issubset(spigey_identities):
-                    true_spigey_ips.add(identifier)
+            (
+                spigey_identities,
+                true_spigey_ips,
+                isolated_spigey_alts,
+                cleaned_raw_data,
+            ) = _split_spigey(raw_data)
             print(
                 f"[Alts Pre-processor] Identified {len(true_spigey_ips)} trusted Spigey identifiers."
             )
 
-            cleaned_raw_data = {}
-            isolated_spigey_alts = set()
-
-            for identifier, users in raw_data.items():
-                if identifier in true_spigey_ips:
-                    isolated_spigey_alts.update(users)
-                else:
-                    cleaned_users = [
-                        user for user in users if user not in spigey_identities
-                    ]
-                    if cleaned_users:
-                        cleaned_raw_data[identifier] = cleaned_users
-
             data_to_process = cleaned_raw_data
         else:
             print(
@@ -91,42 +343,27 @@ class AltsHandler:
             data_to_process = raw_data
 
         print("[Alts Pre-processor] Processing data...")
+        # Bulk merge: re-sort once on next use rather than insorting every new user
+        self._sorted_usernames = None
         timestamp = datetime.now().isoformat()
-        for identifier, users in data_to_process.items():
-            all_users_in_group = set(users)
-            all_ips_in_group = (
-                {identifier}
-                if is_valid_ipv4(identifier) or is_valid_ipv6(identifier)
-                else set()
-            )
-
-            for user in list(all_users_in_group):
-                if user in self.alts_data:
-                    all_users_in_group.update(self.alts_data[user].get("alts", set()))
-                    all_ips_in_group.update(self.alts_data[user].get("ips", set()))
-
-            for user in all_users_in_group:
-                if user not in self.alts_data:
-                    self.alts_data[user] = {
-                        "alts": set(),
-                        "ips": set(),
-                        "first_seen": timestamp,
-                        "last_updated": timestamp,
-                    }
-                self.alts_data[user]["alts"].update(all_users_in_group)
-                self.alts_data[user]["ips"].update(all_ips_in_group)
-                self.alts_data[user]["last_updated"] = timestamp
+        self._merge_groups(
+            (
+                (users, _identifier_ips(identifier))
+                for identifier, users in data_to_process.items()
+            ),
+            timestamp,
+        )
 
         if self.clean_spigey:
             print("[Alts Pre-processor] Injecting isolated Spigey data...")
-            final_spigey_group = {
-                "alts": isolated_spigey_alts.union(spigey_identities),
-                "ips": true_spigey_ips,
-                "first_seen": timestamp,
-                "last_updated": timestamp,
-            }
-            for user in final_spigey_group["alts"]:
-                self.alts_data[user] = final_spigey_group
+            final_spigey_group = AltsRecord(
+                alts=isolated_spigey_alts.union(spigey_identities),
+                ips=true_spigey_ips,
+                first_seen=timestamp,
+                last_updated=timestamp,
+            )
+            for user in final_spigey_group.alts:
+                self._set_record(user, final_spigey_group)
 
         if self.apply_overrides(timestamp):
             print("[Alts Pre-processor] Override rules applied.")
@@ -137,20 +374,20 @@ class AltsHandler:
         self.save_alts_data()
         print("[Alts Pre-processor] Cleaned and structured data has been saved.")
 
-    def load_alts_data(self):
-        """Loads structured alts data from disk."""
-        if self.alts_data_file.exists():
+    def load_alts_data(self, loaded_data: Optional[Dict] = None):
+        """Loads structured alts data, from disk unless already parsed."""
+        if loaded_data is None:
+            loaded_data = self._read_alts_file()
+        if loaded_data is not None:
             try:
-                with open(self.alts_data_file, "r", encoding="utf-8") as f:
-                    loaded_data = json.load(f)
                 if "Spigey" in loaded_data and "alts" in loaded_data["Spigey"]:
                     self.alts_data = {
-                        username: {
-                            "alts": set(data.get("alts", [])),
-                            "ips": set(data.get("ips", [])),
-                            "first_seen": data.get("first_seen", ""),
-                            "last_updated": data.get("last_updated", ""),
-                        }
+                        intern(username): AltsRecord(
+                            alts=set(map(intern, data.get("alts", []))),
+                            ips=set(map(intern, data.get("ips", []))),
+                            first_seen=data.get("first_seen", ""),
+                            last_updated=data.get("last_updated", ""),
+                        )
                         for username, data in loaded_data.items()
                     }
                 else:
@@ -164,23 +401,39 @@ class AltsHandler:
         else:
             self.alts_data = {}
 
+        self.rebuild_indexes()
         if self.apply_overrides():
             self.save_alts_data()
 
+    def save_if_dirty(self):
+        """Saves alts data only if it changed since the last save."""
+        if self._dirty:
+            self.save_alts_data()
+
     def save_alts_data(self):
         """Saves alts data to disk."""
+        # Members of a merged group share one alts/ips set, so sort each set once
+        # and reuse the list for every member instead of copying it per user
+        sorted_sets: Dict[int, List[str]] = {}
+
+        def sorted_once(values: Set[str]) -> List[str]:
+            result = sorted_sets.get(id(values))
+            if result is None:
+                result = sorted_sets[id(values)] = sorted(values)
+            return result
+
         try:
             data_to_save = {
                 username: {
-                    "alts": sorted(list(data["alts"])),
-                    "ips": sorted(list(data["ips"])),
-                    "first_seen": data["first_seen"],
-                    "last_updated": data["last_updated"],
+                    "alts": sorted_once(record.alts),
+                    "ips": sorted_once(record.ips),
+                    "first_seen": record.first_seen,
+                    "last_updated": record.last_updated,
                 }
-                for username, data in self.alts_data.items()
+                for username, record in self.alts_data.items()
             }
-            with open(self.alts_data_file, "w", encoding="utf-8") as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.alts_data_file, data_to_save)
+            self._dirty = False
         except Exception as e:
             print(f"[{self.data_dir.name}] Error saving alts data: {e}")
 
@@ -208,19 +461,19 @@ class AltsHandler:
             alt_values = entry.get("alts", [])
             if not isinstance(alt_values, list):
                 alt_values = []
-            alt_set = {str(name) for name in alt_values if isinstance(name, str)}
+            alt_set = {intern(name) for name in alt_values if isinstance(name, str)}
 
             ips_specified = "ips" in entry
             ip_values = entry.get("ips", []) if ips_specified else []
             if not isinstance(ip_values, list):
                 ip_values = []
             ip_set = {
-                ip
+                intern(ip)
                 for ip in ip_values
                 if isinstance(ip, str) and (is_valid_ipv4(ip) or is_valid_ipv6(ip))
             }
 
-            overrides[str(main_name)] = {
+            overrides[intern(str(main_name))] = {
                 "alts": alt_set,
                 "ips": ip_set,
                 "ips_specified": ips_specified,
@@ -237,6 +490,27 @@ class AltsHandler:
         changed = False
         timestamp = timestamp or datetime.now().isoformat()
 
+        # Only records touching some override can be affected; IP sets only shrink
+        # while overrides apply, so the IPs collected up front cover every pass
+        all_override_alts: Set[str] = set()
+        all_override_ips: Set[str] = set()
+        for main_name, override in self.alts_overrides.items():
+            all_override_alts.add(main_name)
+            all_override_alts.update(override.get("alts", ()))
+            if override.get("ips_specified"):
+                all_override_ips.update(override.get("ips", ()))
+        for name in all_override_alts:
+            record = self.alts_data.get(name)
+            if record:
+                all_override_ips.update(record.ips)
+        candidates = {
+            username
+            for username, record in self.alts_data.items()
+            if username not in record.alts
+            or not record.alts.isdisjoint(all_override_alts)
+            or not record.ips.isdisjoint(all_override_ips)
+        }
+
         for main_name, override in self.alts_overrides.items():
             override_alts = set(override.get("alts", set()))
             override_alts.add(main_name)
@@ -246,11 +520,11 @@ class AltsHandler:
             for name in override_alts:
                 record = self.alts_data.get(name)
                 if record:
-                    if record.get("first_seen"):
-                        existing_first_seen.append(record.get("first_seen"))
-                    existing_ips.update(record.get("ips", set()))
+                    if record.first_seen:
+                        existing_first_seen.append(record.first_seen)
+                    existing_ips.update(record.ips)
 
-            override_ips = set(existing_ips)
+            override_ips = existing_ips
             if override.get("ips_specified"):
                 override_ips.update(override.get("ips", set()))
 
@@ -263,77 +537,75 @@ class AltsHandler:
             first_seen_candidates = [fs for fs in existing_first_seen if fs]
             first_seen = min(first_seen_candidates) if first_seen_candidates else timestamp
 
-            for username, record in list(self.alts_data.items()):
+            # Collect first: group members share sets, so stripping one clears the rest
+            affected = []
+            for username in candidates:
                 if username in override_alts:
                     continue
-
-                original_alts = set(record.get("alts", set()))
-                original_ips = set(record.get("ips", set()))
-
-                updated_alts = original_alts - override_alts
-                if username not in updated_alts:
-                    updated_alts.add(username)
-                updated_ips = original_ips - override_ips
-
-                if updated_alts != original_alts or updated_ips != original_ips:
-                    changed = True
-                    record["alts"] = updated_alts
-                    record["ips"] = updated_ips
-                    if not record.get("first_seen"):
-                        record["first_seen"] = timestamp
-                    record["last_updated"] = timestamp
-
-            override_alts_final = set(override_alts)
-            override_ips_final = set(override_ips)
-
-            for name in override_alts_final:
+                record = self.alts_data[username]
+                if not (
+                    username in record.alts
+                    and record.alts.isdisjoint(override_alts)
+                    and record.ips.isdisjoint(override_ips)
+                ):
+                    affected.append((username, record))
+            for username, record in affected:
+                record.alts.difference_update(override_alts)
+                record.alts.add(username)
+                record.ips.difference_update(override_ips)
+                if not record.first_seen:
+                    record.first_seen = timestamp
+                record.last_updated = timestamp
+            if affected:
+                changed = True
+
+            # One record shared by every member, as merged groups share theirs
+            override_record = AltsRecord(
+                alts=override_alts,
+                ips=override_ips,
+                first_seen=first_seen,
+                last_updated=timestamp,
+            )
+            for name in override_alts:
                 existing = self.alts_data.get(name)
-                previous_alts = existing.get("alts") if existing else set()
-                previous_ips = existing.get("ips") if existing else set()
-                previous_first_seen = existing.get("first_seen") if existing else None
-
                 if (
                     existing is None
-                    or previous_alts != override_alts_final
-                    or previous_ips != override_ips_final
-                    or previous_first_seen != first_seen
-                    or existing.get("last_updated") != timestamp
+                    or existing.alts != override_alts
+                    or existing.ips != override_ips
+                    or existing.first_seen != first_seen
                 ):
                     changed = True
-
-                self.alts_data[name] = {
-                    "alts": set(override_alts_final),
-                    "ips": set(override_ips_final),
-                    "first_seen": first_seen,
-                    "last_updated": timestamp,
-                }
-
+                self._set_record(name, override_record)
+            # Later overrides may strip names from the records written here
+            candidates.update(override_alts)
+
+        if changed:
+            # Overrides strip IPs from other records, so recount rather than patching
+            self.rebuild_indexes()
+            self._dirty = True
         return changed
 
     def parse_alts_response(self, content: str) -> Optional[Dict]:
         """Parses Asteroide bot response."""
         try:
-            main_match = re.search(r"^(\S+) has \d+ alts:", content, re.MULTILINE)
+            main_match = _MAIN_RE.search(content)
             if not main_match:
                 return None
             main_user = main_match.group(1)
-            alts = re.findall(r"^-> (\S+)$", content, re.MULTILINE) or [main_user]
-            ip_section_match = re.search(
-                r"On \d+ IPs:(.*?)(?=\n\n|\Z)", content, re.DOTALL
-            )
+            alts = _ALT_RE.findall(content) or [main_user]
+            ip_section_match = _IP_SECTION_RE.search(content)
 
             # Updated to support both IPv4 and IPv6
             ips = []
             if ip_section_match:
-                # IPv4 pattern
-                ipv4_ips = re.findall(
-                    r"-> ((?:\d{1,3}\.){3}\d{1,3})", ip_section_match.group(1)
-                )
-                # IPv6 pattern (simplified, matches common formats)
-                ipv6_ips = re.findall(
-                    r"-> ([0-9a-fA-F:]+(?::[0-9a-fA-F]+)*)", ip_section_match.group(1)
-                )
-                ips = ipv4_ips + [ip for ip in ipv6_ips if is_valid_ipv6(ip)]
+                # One "-> <ip> [details]" per line; validating the IP token beats two regex scans
+                for line in ip_section_match.group(1).splitlines():
+                    line = line.strip()
+                    if not line.startswith("-> "):
+                        continue
+                    fields = line[3:].split(None, 1)
+                    if fields and (is_valid_ipv4(fields[0]) or is_valid_ipv6(fields[0])):
+                        ips.append(fields[0])
 
             return {
                 "main_user": main_user,
@@ -348,29 +620,13 @@ class AltsHandler:
     def store_alts_data(self, parsed_data: Dict):
         """Stores parsed alts data."""
         main_user = parsed_data["main_user"]
-        all_users_in_group = set(parsed_data.get("alts", []))
-        all_ips_in_group = set(parsed_data.get("ips", []))
-
-        for user in list(all_users_in_group):
-            if user in self.alts_data:
-                all_users_in_group.update(self.alts_data[user].get("alts", set()))
-                all_ips_in_group.update(self.alts_data[user].get("ips", set()))
-
-        for user in all_users_in_group:
-            if user not in self.alts_data:
-                self.alts_data[user] = {
-                    "alts": set(),
-                    "ips": set(),
-                    "first_seen": parsed_data["timestamp"],
-                    "last_updated": parsed_data["timestamp"],
-                }
-
-            self.alts_data[user]["alts"].update(all_users_in_group)
-            self.alts_data[user]["ips"].update(all_ips_in_group)
-            self.alts_data[user]["last_updated"] = parsed_data["timestamp"]
+        self._merge_groups(
+            [(parsed_data.get("alts", []), set(parsed_data.get("ips", [])))],
+            parsed_data["timestamp"],
+        )
 
+        # Written by the bot's periodic flush, so bursts of replies share one save
         self.apply_overrides(parsed_data["timestamp"])
-        self.save_alts_data()
         print(f"[AltsHandler] Updated alts data for group starting with {main_user}")
 
     async def refresh_alts_data(self, alts_refresh_url: str, ip_handler, http_client: Optional[httpx.AsyncClient] = None) -> bool:
@@ -382,179 +638,121 @@ class AltsHandler:
         recent_cache_valid = (
             self._cached_remote_data is not None
             and self._last_alts_fetch is not None
-            and (datetime.now() - self._last_alts_fetch) < timedelta(seconds=5)
+            and time.monotonic() - self._last_alts_fetch < 5.0
         )
 
         if recent_cache_valid:
             print("[Alts Refresh] Using cached remote data (recent fetch).")
             remote_data = self._cached_remote_data
         else:
-            client = http_client or httpx.AsyncClient()
-            own_client = http_client is None
+            client = http_client or ip_handler.get_client()
 
             print("[Alts Refresh] Fetching remote data...")
+            headers = {}
+            if self._remote_etag and self._cached_remote_data is not None:
+                headers["If-None-Match"] = self._remote_etag
             try:
-                res = await client.get(alts_refresh_url, timeout=30)
-                res.raise_for_status()
-                remote_data = res.json()
-                self._cached_remote_data = remote_data
-                self._last_alts_fetch = datetime.now()
-            except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError) as e:
+                res = await client.get(alts_refresh_url, timeout=30, headers=headers)
+                if res.status_code == 304:
+                    print("[Alts Refresh] Remote data unchanged, using cached copy.")
+                    remote_data = self._cached_remote_data
+                else:
+                    res.raise_for_status()
+                    remote_data = orjson.loads(res.content)
+                    self._cached_remote_data = remote_data
+                    self._remote_etag = res.headers.get("etag")
+                self._last_alts_fetch = time.monotonic()
+            except (httpx.RequestError, httpx.HTTPStatusError, orjson.JSONDecodeError) as e:
                 print(f"[Alts Refresh] Failed to fetch or parse remote data: {e}")
-                if own_client:
-                    await client.aclose()
                 return False
-            finally:
-                if own_client:
-                    await client.aclose()
 
         timestamp = datetime.now().isoformat()
         update_count = 0
+        self._sorted_usernames = None
 
         if self.clean_spigey:
             print(
                 "[Alts Refresh] `clean-spigey` is true. Pre-processing remote data to isolate Spigey..."
             )
 
-            spigey_identities = {
-                user
-                for users in remote_data.values()
-                for user in users
-                if user.startswith("...")
-            }
-            spigey_identities.add("Spigey")
-            spigey_identities.add("911WasMyFault")
-            spigey_identities.add(".ASW_<h1>nigger</h1>")
-
-            true_spigey_ips = {"193.32.248.162"}
-            for identifier, users in remote_data.items():
-                if set(users).issubset(spigey_identities):
-                    true_spigey_ips.add(identifier)
-
-            cleaned_remote_data = {}
-            remote_spigey_alts = set()
-            for identifier, users in remote_data.items():
-                if identifier in true_spigey_ips:
-                    remote_spigey_alts.update(users)
-                else:
-                    cleaned_users = [
-                        user for user in users if user not in spigey_identities
-                    ]
-                    if cleaned_users:
-                        cleaned_remote_data[identifier] = cleaned_users
+            (
+                spigey_identities,
+                true_spigey_ips,
+                remote_spigey_alts,
+                cleaned_remote_data,
+            ) = _split_spigey(remote_data)
 
             data_to_process = cleaned_remote_data
 
             print("[Alts Refresh] Merging sanitized remote data for all other users...")
-            for identifier, users in data_to_process.items():
-                update_count += 1
-                all_users_in_group = set(users)
-                all_ips_in_group = (
-                    {identifier}
-                    if is_valid_ipv4(identifier) or is_valid_ipv6(identifier)
-                    else set()
-                )
-
-                for user in list(all_users_in_group):
-                    if user in self.alts_data and user not in spigey_identities:
-                        all_users_in_group.update(
-                            self.alts_data[user].get("alts", set())
-                        )
-                        all_ips_in_group.update(self.alts_data[user].get("ips", set()))
-
-                for user in all_users_in_group:
-                    if user not in self.alts_data:
-                        self.alts_data[user] = {
-                            "alts": set(),
-                            "ips": set(),
-                            "first_seen": timestamp,
-                            "last_updated": timestamp,
-                        }
-                    self.alts_data[user]["alts"].update(all_users_in_group)
-                    self.alts_data[user]["ips"].update(all_ips_in_group)
-                    self.alts_data[user]["last_updated"] = timestamp
+            update_count += len(data_to_process)
+            touched_ips = self._merge_groups(
+                (
+                    (users, _identifier_ips(identifier))
+                    for identifier, users in data_to_process.items()
+                ),
+                timestamp,
+                frozen=spigey_identities,
+            )
 
             print("[Alts Refresh] Injecting final isolated Spigey data...")
-            spigey_base_record = self.alts_data.get(
-                "Spigey", {"alts": set(), "ips": set(), "first_seen": timestamp}
+            spigey_base_record = self.alts_data.get("Spigey") or AltsRecord(
+                first_seen=timestamp
             )
-            final_spigey_alts = (
-                spigey_base_record["alts"]
-                .union(remote_spigey_alts)
-                .union(spigey_identities)
+            final_spigey_alts = spigey_base_record.alts.union(
+                remote_spigey_alts, spigey_identities
+            )
+            final_spigey_ips = spigey_base_record.ips.union(true_spigey_ips)
+            touched_ips.update(final_spigey_ips)
+            final_spigey_group = AltsRecord(
+                alts=final_spigey_alts,
+                ips=final_spigey_ips,
+                first_seen=spigey_base_record.first_seen,
+                last_updated=timestamp,
             )
-            final_spigey_ips = spigey_base_record["ips"].union(true_spigey_ips)
-            final_spigey_group = {
-                "alts": final_spigey_alts,
-                "ips": final_spigey_ips,
-                "first_seen": spigey_base_record["first_seen"],
-                "last_updated": timestamp,
-            }
             for user in final_spigey_alts:
-                self.alts_data[user] = final_spigey_group
+                self._set_record(user, final_spigey_group)
         else:
             print("[Alts Refresh] `clean-spigey` is false. Merging all remote data...")
-            for identifier, users in remote_data.items():
-                update_count += 1
-                all_users_in_group = set(users)
-                all_ips_in_group = (
-                    {identifier}
-                    if is_valid_ipv4(identifier) or is_valid_ipv6(identifier)
-                    else set()
-                )
+            update_count += len(remote_data)
+            touched_ips = self._merge_groups(
+                (
+                    (users, _identifier_ips(identifier))
+                    for identifier, users in remote_data.items()
+                ),
+                timestamp,
+            )
 
-                for user in list(all_users_in_group):
-                    if user in self.alts_data:
-                        all_users_in_group.update(
-                            self.alts_data[user].get("alts", set())
-                        )
-                        all_ips_in_group.update(self.alts_data[user].get("ips", set()))
-
-                for user in all_users_in_group:
-                    if user not in self.alts_data:
-                        self.alts_data[user] = {
-                            "alts": set(),
-                            "ips": set(),
-                            "first_seen": timestamp,
-                            "last_updated": timestamp,
-                        }
-                    self.alts_data[user]["alts"].update(all_users_in_group)
-                    self.alts_data[user]["ips"].update(all_ips_in_group)
-                    self.alts_data[user]["last_updated"] = timestamp
-
-        overrides_changed = self.apply_overrides(timestamp)
+        self.apply_overrides(timestamp)
+        for override in self.alts_overrides.values():
+            touched_ips.update(override["ips"])
 
         # Fetch IP geo data for new IPs
         print("[Alts Refresh] Fetching IP geolocation data...")
-        all_ips = set()
-        for data in self.alts_data.values():
-            all_ips.update(data.get("ips", set()))
-
-        new_ips = [ip for ip in all_ips if ip not in ip_handler.ip_geo_data]
+        # Only IPs merged in this refresh can be new; untouched records were checked before
+        new_ips = [ip for ip in touched_ips if ip not in ip_handler.ip_geo_data]
 
         if new_ips:
             print(f"[Alts Refresh] Fetching geo data for {len(new_ips)} new IPs...")
             geo_results = await ip_handler.fetch_ip_info_batch(new_ips)
 
             for ip, geo_data in geo_results.items():
-                ip_handler.ip_geo_data[ip] = {
-                    "country": geo_data.get("country"),
-                    "countryCode": geo_data.get("countryCode"),
-                    "region": geo_data.get("region"),
-                    "regionName": geo_data.get("regionName"),
-                    "city": geo_data.get("city"),
-                    "isp": geo_data.get("isp"),
-                    "org": geo_data.get("org"),
-                    "proxy": geo_data.get("proxy", False),
-                    "hosting": geo_data.get("hosting", False),
-                    "last_updated": timestamp,
-                }
+                ip_handler.store_ip_geo(ip, geo_data, timestamp)
 
             ip_handler.save_ip_geo_data()
             print(f"[Alts Refresh] Saved geo data for {len(geo_results)} IPs")
 
-        if update_count > 0 or overrides_changed:
-            self.save_alts_data()
+        self.save_if_dirty()
 
         print(f"[Alts Refresh] Successfully merged data for {update_count} groups.")
         return True
+
+
+def _preprocess_in_worker(data_dir: Path, clean_spigey: bool) -> Dict[str, AltsRecord]:
+    """Process-pool entry point: preprocesses and saves alts_data.json, returning the records.
+
+    Pickling keeps group members sharing their alts/ips sets on the way back.
+    """
+    handler = AltsHandler(data_dir, clean_spigey)
+    handler.load_and_preprocess_alts_data()
+    return handler.alts_data
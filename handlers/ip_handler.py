@@ -1,28 +1,51 @@
 """IP geolocation handling with IPv6 support and VPN detection."""
 
+import asyncio
 import json
 import httpx
-import re
+import orjson
+import ahocorasick
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from utils.constants import COUNTRY_FLAGS, VPN_PROVIDERS
-from utils.helpers import is_valid_ipv4, is_valid_ipv6, is_valid_ip
-
+from utils.helpers import is_valid_ipv4, is_valid_ipv6, is_valid_ip, write_json_atomic
+from utils.rate_limiter import get_bucket
 
 class IPHandler:
     def __init__(self, data_dir: Path):
         self.data_dir = data_dir
         self.ip_geo_file = data_dir / "ip_geo_data.json"
         self.ip_geo_data = {}
+        self._geo_line_cache: Dict[str, str] = {}
+        self._list_line_cache: Dict[str, str] = {}
+        self._vpn_automaton = None
+        # Many IPs share an ISP/org pair, so each pair is only scanned once
+        self._vpn_cache: Dict[Tuple[str, str], Optional[str]] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._build_vpn_matcher()
         self.load_ip_geo_data()
 
+    def _build_vpn_matcher(self):
+        """Compiles VPN_PROVIDERS into a single-pass Aho-Corasick automaton."""
+        # Values are (priority, provider) so the first keyword in VPN_PROVIDERS still wins
+        automaton = ahocorasick.Automaton()
+        for priority, (keyword, provider_name) in enumerate(VPN_PROVIDERS.items()):
+            automaton.add_word(keyword, (priority, provider_name))
+        automaton.make_automaton()
+        self._vpn_automaton = automaton
+
     def load_ip_geo_data(self):
         """Loads IP geolocation data from disk."""
+        self._geo_line_cache.clear()
+        self._list_line_cache.clear()
         if self.ip_geo_file.exists():
             try:
                 with open(self.ip_geo_file, "r", encoding="utf-8") as f:
                     self.ip_geo_data = json.load(f)
+                for geo in self.ip_geo_data.values():
+                    if "flag" not in geo:
+                        geo["flag"] = COUNTRY_FLAGS.get(geo.get("countryCode") or "", "🌐")
                 print(
                     f"[{self.data_dir.name}] Loaded {len(self.ip_geo_data)} IP geo records"
                 )
@@ -32,26 +55,61 @@ class IPHandler:
         else:
             self.ip_geo_data = {}
 
+    def store_ip_geo(self, ip: str, geo_data: Dict, timestamp: str):
+        """Stores the cached geo entry for an ip-api.com result, including its display flag."""
+        self.ip_geo_data[ip] = {
+            "country": geo_data.get("country"),
+            "countryCode": geo_data.get("countryCode"),
+            "region": geo_data.get("region"),
+            "regionName": geo_data.get("regionName"),
+            "city": geo_data.get("city"),
+            "isp": geo_data.get("isp"),
+            "org": geo_data.get("org"),
+            "proxy": geo_data.get("proxy", False),
+            "hosting": geo_data.get("hosting", False),
+            "flag": COUNTRY_FLAGS.get(geo_data.get("countryCode") or "", "🌐"),
+            "last_updated": timestamp,
+        }
+
     def save_ip_geo_data(self):
         """Saves IP geolocation data to disk."""
+        # Every mutation of ip_geo_data is followed by a save, so rendered lines go stale here
+        self._geo_line_cache.clear()
+        self._list_line_cache.clear()
         try:
-            with open(self.ip_geo_file, "w", encoding="utf-8") as f:
-                json.dump(self.ip_geo_data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.ip_geo_file, self.ip_geo_data)
         except Exception as e:
             print(f"[{self.data_dir.name}] Error saving IP geo data: {e}")
 
+    def get_client(self) -> httpx.AsyncClient:
+        """Returns the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Closes the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     def detect_vpn_provider(self, isp: str, org: str) -> Optional[str]:
         """
         Detects VPN provider from ISP or organization name.
         Returns the provider name if detected, None otherwise.
         """
-        search_text = f"{isp or ''} {org or ''}".lower()
-
-        for keyword, provider_name in VPN_PROVIDERS.items():
-            if keyword in search_text:
-                return provider_name
+        key = (isp or "", org or "")
+        try:
+            return self._vpn_cache[key]
+        except KeyError:
+            pass
+        search_text = f"{key[0]} {key[1]}".lower()
 
-        return None
+        best = min((value for _, value in self._vpn_automaton.iter(search_text)), default=None)
+        provider = self._vpn_cache[key] = best[1] if best else None
+        return provider
 
     async def fetch_ip_info(self, ip: str) -> Optional[Dict]:
         """Fetches IP information from ip-api.com (supports both IPv4 and IPv6)."""
@@ -61,15 +119,15 @@ class IPHandler:
         fields_param = "query,status,country,countryCode,region,regionName,city,zip,lat,lon,timezone,isp,org,as,proxy,hosting"
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"http://ip-api.com/json/{ip}?fields={fields_param}", timeout=10
-                )
-                response.raise_for_status()
-                data = response.json()
-                if data.get("status") == "success":
-                    return data
-                return None
+            await get_bucket("ip-api.com").acquire()
+            response = await self.get_client().get(
+                f"http://ip-api.com/json/{ip}?fields={fields_param}", timeout=10
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            if data.get("status") == "success":
+                return data
+            return None
         except Exception as e:
             print(f"[IPHandler] Error fetching IP info for {ip}: {e}")
             return None
@@ -80,39 +138,47 @@ class IPHandler:
             return {}
 
         results = {}
+        client = self.get_client()
         fields_param = "query,status,country,countryCode,region,regionName,city,isp,org,as,proxy,hosting"
-
-        # Process in batches of 100 (API limit)
-        for i in range(0, len(ips), 100):
-            batch = ips[i : i + 100]
-            try:
-                async with httpx.AsyncClient() as client:
+        # The batch endpoint has its own, stricter per-minute budget
+        bucket = get_bucket("ip-api.com/batch")
+        semaphore = asyncio.Semaphore(3)
+
+        async def fetch_batch(batch: List[str]) -> List[Dict]:
+            async with semaphore:
+                try:
+                    await bucket.acquire()
                     response = await client.post(
                         f"http://ip-api.com/batch?fields={fields_param}",
                         json=batch,
                         timeout=30,
                     )
                     response.raise_for_status()
-                    batch_results = response.json()
-
-                    for data in batch_results:
-                        if data.get("status") == "success":
-                            ip = data.get("query")
-                            results[ip] = data
-
-                # Rate limiting: wait 2 seconds between batches
-                if i + 100 < len(ips):
-                    import asyncio
+                    return orjson.loads(response.content)
+                except Exception as e:
+                    print(f"[IPHandler] Error in batch IP fetch: {e}")
+                    return []
 
-                    await asyncio.sleep(2)
-
-            except Exception as e:
-                print(f"[IPHandler] Error in batch IP fetch: {e}")
+        # Process in batches of 100 (API limit)
+        batches = [ips[i : i + 100] for i in range(0, len(ips), 100)]
+        for batch_results in await asyncio.gather(*(fetch_batch(b) for b in batches)):
+            for data in batch_results:
+                if data.get("status") == "success":
+                    results[data.get("query")] = data
 
         return results
 
     def format_ip_with_geo(self, ip: str) -> str:
-        """Formats an IP address with flag, region, VPN detection, etc."""
+        """Formats an IP address with flag, region, VPN detection, etc.
+
+        Rendered lines are cached until the geo data is next loaded or saved.
+        """
+        line = self._geo_line_cache.get(ip)
+        if line is None:
+            line = self._geo_line_cache[ip] = self._render_ip_with_geo(ip)
+        return line
+
+    def _render_ip_with_geo(self, ip: str) -> str:
         # IPv6 addresses don't work well in markdown links, so display them as plain text
         if is_valid_ipv6(ip):
             ip_display = f"`{ip}`"
@@ -120,11 +186,11 @@ class IPHandler:
             ip_url = f"https://whatismyipaddress.com/ip/{ip}"
             ip_display = f"[{ip}](<{ip_url}>)"
 
-        if ip not in self.ip_geo_data:
+        geo = self.ip_geo_data.get(ip)
+        if geo is None:
             return f"🌐 {ip_display}"
 
-        geo = self.ip_geo_data[ip]
-        flag = COUNTRY_FLAGS.get(geo.get("countryCode", ""), "🌐")
+        flag = geo["flag"]
 
         info_parts = []
         region_name = geo.get("regionName", geo.get("region", ""))
@@ -146,4 +212,12 @@ class IPHandler:
         if info_parts:
             final_string += f" | {' '.join(info_parts)}"
 
-        return final_string
\ No newline at end of file
+        return final_string
+
+    def format_ip_list_line(self, ip: str) -> str:
+        """Returns the cached `• <formatted ip>` bullet line used by list pages."""
+        line = self._list_line_cache.get(ip)
+        if line is None:
+            line = "• " + self.format_ip_with_geo(ip)
+            self._list_line_cache[ip] = line
+        return line
@@ -1,31 +1,64 @@
 """Handles logging to a specific channel."""
 
+import asyncio
 import discord
 import json
 import io
+import orjson
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 class LogHandler:
     def __init__(self, bot):
         self.bot = bot
         self.log_channels_file = Path(__file__).parent.parent / "config" / "log_channels.json"
+        self._log_channels: List[int] = []
+        # (mtime_ns, size) of the file the cached list was read from
+        self._log_channels_stamp: Optional[Tuple[int, int]] = None
 
     def _load_log_channels(self) -> List[int]:
-        if not self.log_channels_file.exists():
-            return []
-        with open(self.log_channels_file, "r") as f:
-            return json.load(f)
+        """Returns the log channel IDs, re-reading the file only when it has changed."""
+        try:
+            stat = self.log_channels_file.stat()
+        except FileNotFoundError:
+            self._log_channels, self._log_channels_stamp = [], None
+            return self._log_channels
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._log_channels_stamp:
+            with open(self.log_channels_file, "r") as f:
+                self._log_channels = json.load(f)
+            self._log_channels_stamp = stamp
+        return self._log_channels
 
-    async def log(self, embed: discord.Embed = None, file: discord.File = None):
-        """Sends a log message to all log channels."""
-        log_channels = self._load_log_channels()
-        for channel_id in log_channels:
-            try:
+    async def _send_one(self, channel_id: int, embed: Optional[discord.Embed], attachments: List[Tuple[str, bytes]]):
+        """Sends one log message to one channel, ignoring channels we cannot reach."""
+        try:
+            channel = self.bot.client.get_channel(channel_id)
+            if channel is None:
                 channel = await self.bot.client.fetch_channel(channel_id)
-                await channel.send(embed=embed, file=file)
-            except (discord.NotFound, discord.Forbidden):
-                pass
+            # A discord.File is consumed by a send, so each channel gets its own
+            files = [discord.File(io.BytesIO(data), filename=filename) for filename, data in attachments]
+            await channel.send(embed=embed, files=files or None)
+        except (discord.NotFound, discord.Forbidden):
+            pass
+
+    async def log(self, embed: discord.Embed = None, file: discord.File = None, files: Optional[List[discord.File]] = None):
+        """Sends a log message, with any attached files, to all log channels."""
+        log_channels = self._load_log_channels()
+        if not log_channels:
+            return
+        attachments = []
+        for log_file in ([file] if file is not None else []) + (files or []):
+            data = log_file.fp.read()
+            attachments.append((log_file.filename, data.encode() if isinstance(data, str) else data))
+        results = await asyncio.gather(
+            *(self._send_one(channel_id, embed, attachments) for channel_id in log_channels),
+            return_exceptions=True,
+        )
+        # One failing channel must not stop the others, but its error should still be seen
+        for channel_id, result in zip(log_channels, results):
+            if isinstance(result, BaseException):
+                print(f"[LogHandler] Error sending log to channel {channel_id}: {result!r}")
 
     async def log_command(self, message: discord.Message):
         """Logs a command usage."""
@@ -47,11 +80,12 @@ class LogHandler:
 
     async def log_api_request(self, request: Dict[str, Any], response: Dict[str, Any]):
         """Logs an API request and response."""
-        request_file = discord.File(io.StringIO(json.dumps(request, indent=2)), filename="request.json")
-        response_file = discord.File(io.StringIO(json.dumps(response, indent=2)), filename="response.json")
+        # NON_STR_KEYS keeps json.dumps' handling of int keys
+        options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        request_file = discord.File(io.BytesIO(orjson.dumps(request, option=options)), filename="request.json")
+        response_file = discord.File(io.BytesIO(orjson.dumps(response, option=options)), filename="response.json")
         embed = discord.Embed(
             title="API Request",
             color=discord.Color.green(),
         )
-        await self.log(embed=embed, file=request_file)
-        await self.log(embed=embed, file=response_file)
+        await self.log(embed=embed, files=[request_file, response_file])
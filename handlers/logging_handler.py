@@ -1,18 +1,116 @@
 """Message and attachment logging handlers."""
 
-import aiofiles
+import asyncio
 import httpx
+import os
+import time
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
 from utils.helpers import sanitize_filename
 import discord
 
 
+def _write_buffers(buffers: Dict[Path, bytearray]):
+    """Appends each buffer to its file; runs in a worker thread."""
+    for path, buffer in buffers.items():
+        try:
+            try:
+                with open(path, "ab") as f:
+                    f.write(buffer)
+            except FileNotFoundError:
+                # The directory was removed after it was first created
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(buffer)
+        except Exception as e:
+            print(f"[LoggingHandler] Error writing {path}: {e}")
+
+
 class LoggingHandler:
+    # Buffered log lines are written at least this often, or sooner once a file's
+    # pending bytes pass the threshold
+    _FLUSH_INTERVAL = 0.5
+    _FLUSH_THRESHOLD = 64 * 1024
+    # Attachments are streamed to disk in pieces of this size
+    _DOWNLOAD_CHUNK = 128 * 1024
+
     def __init__(self, data_dir: Path):
         self.data_dir = data_dir
         self.dm_log_dir = data_dir / "logs" / "dms"
         self.guild_log_dir = data_dir / "logs"
+        self._buffers: Dict[Path, bytearray] = {}
+        # Serializes flushes so two writes to the same file never interleave
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # Formatted (date, date time, time) for the wall-clock second in _stamp_second
+        self._stamp_second = -1
+        # Log directories already created, so each message skips the mkdir syscalls
+        self._known_dirs: Set[Path] = set()
+        self._stamps: Tuple[str, str, str] = ("", "", "")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Returns the shared attachment download client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    def _ensure_dir(self, path: Path):
+        """Creates `path` (and parents) unless this handler already did."""
+        if path not in self._known_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(path)
+
+    def _timestamps(self) -> Tuple[str, str, str]:
+        """Returns the current (date, date time, time) strings, formatted once per second."""
+        second = int(time.time())
+        if second != self._stamp_second:
+            now = datetime.fromtimestamp(second)
+            self._stamps = (
+                now.strftime("%Y-%m-%d"),
+                now.strftime("%Y-%m-%d %H:%M:%S"),
+                now.strftime("%H-%M-%S"),
+            )
+            self._stamp_second = second
+        return self._stamps
+
+    async def _append(self, path: Path, log_entry: bytes):
+        """Queues an encoded log line for `path`; the file is written by the next flush."""
+        buffer = self._buffers.get(path)
+        if buffer is None:
+            buffer = self._buffers[path] = bytearray()
+        buffer += log_entry
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if len(buffer) >= self._FLUSH_THRESHOLD:
+            await self.flush()
+
+    async def flush(self):
+        """Writes every buffered log line to disk, one open per file."""
+        async with self._flush_lock:
+            buffers, self._buffers = self._buffers, {}
+            if buffers:
+                # One thread hop for the whole batch rather than aiofiles' one per call
+                await asyncio.to_thread(_write_buffers, buffers)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self._FLUSH_INTERVAL)
+            await self.flush()
+
+    async def aclose(self):
+        """Stops the background flush, writes whatever is still buffered and closes the client."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def log_dm(self, message: discord.Message):
         """Logs a DM message."""
@@ -25,18 +123,15 @@ class LoggingHandler:
                 return
 
             log_dir = self.dm_log_dir / log_dir_name
-            log_dir.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(log_dir)
 
             content = message.content.replace("\n", "\\n")
             if message.attachments:
                 content += f" [Attachments: {', '.join([att.filename for att in message.attachments])}]"
 
-            log_entry = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {sanitize_filename(message.author.name)} ({message.author.id}): {content}\n"
+            log_entry = f"[{self._timestamps()[1]}] {sanitize_filename(message.author.name)} ({message.author.id}): {content}\n"
 
-            async with aiofiles.open(
-                log_dir / "dm_log.txt", "a", encoding="utf-8"
-            ) as f:
-                await f.write(log_entry)
+            await self._append(log_dir / "dm_log.txt", log_entry.encode("utf-8"))
         except Exception as e:
             print(f"[LoggingHandler] Error logging DM: {e}")
 
@@ -51,17 +146,17 @@ class LoggingHandler:
                 / f"{message.guild.id}-{sanitize_filename(message.guild.name)}"
                 / sanitize_filename(message.channel.name)
             )
-            log_dir.mkdir(parents=True, exist_ok=True)
-            log_path = log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.txt"
+            self._ensure_dir(log_dir)
+            date, _, clock = self._timestamps()
+            log_path = log_dir / f"{date}.txt"
 
             content = message.content.replace("\n", "\\n")
             if message.attachments:
                 content += f" [Attachments: {', '.join([att.filename for att in message.attachments])}]"
 
-            log_entry = f"[{datetime.now().strftime('%H-%M-%S')}] {sanitize_filename(message.author.name)} ({message.author.id}): {content}\n"
+            log_entry = f"[{clock}] {sanitize_filename(message.author.name)} ({message.author.id}): {content}\n"
 
-            async with aiofiles.open(log_path, "a", encoding="utf-8") as f:
-                await f.write(log_entry)
+            await self._append(log_path, log_entry.encode("utf-8"))
         except Exception as e:
             print(f"[LoggingHandler] Error logging guild message: {e}")
 
@@ -77,19 +172,38 @@ class LoggingHandler:
                 / sanitize_filename(message.channel.name)
                 / "attachments"
             )
-            attachments_dir.mkdir(parents=True, exist_ok=True)
-
-            async with httpx.AsyncClient() as client:
-                for attachment in message.attachments:
-                    try:
-                        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{sanitize_filename(message.author.name)}-{sanitize_filename(attachment.filename)}"
-                        response = await client.get(attachment.url, timeout=60)
-                        response.raise_for_status()
-                        async with aiofiles.open(attachments_dir / filename, "wb") as f:
-                            await f.write(response.content)
-                    except Exception as e:
-                        print(
-                            f"[LoggingHandler] Error downloading attachment {attachment.filename}: {e}"
-                        )
+            self._ensure_dir(attachments_dir)
+
+            prefix = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{sanitize_filename(message.author.name)}"
+            await asyncio.gather(
+                *(
+                    self._download_attachment(
+                        attachment,
+                        attachments_dir
+                        / f"{prefix}-{attachment.id}-{sanitize_filename(attachment.filename)}",
+                    )
+                    for attachment in message.attachments
+                )
+            )
         except Exception as e:
             print(f"[LoggingHandler] Error logging attachment: {e}")
+
+    async def _download_attachment(self, attachment: discord.Attachment, path: Path):
+        """Downloads one attachment to `path`, reporting rather than raising failures."""
+        # Streamed into a temp file so a failed download never leaves a truncated file at `path`
+        part_path = path.with_name(path.name + ".part")
+        try:
+            async with self._get_client().stream("GET", attachment.url, timeout=60) as response:
+                response.raise_for_status()
+                f = await asyncio.to_thread(open, part_path, "wb")
+                try:
+                    async for chunk in response.aiter_bytes(self._DOWNLOAD_CHUNK):
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, part_path, path)
+        except Exception as e:
+            await asyncio.to_thread(part_path.unlink, missing_ok=True)
+            print(
+                f"[LoggingHandler] Error downloading attachment {attachment.filename}: {e}"
+            )
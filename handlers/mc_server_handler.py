@@ -2,42 +2,122 @@
 
 import asyncio
 import random
-import json
 import logging
 from typing import Dict, List, Optional, Any
 import aiohttp
 import discord
+import orjson
 from datetime import datetime
+from utils.helpers import write_bytes_atomic
 
 class MCServerHandler:
     """Handles Minecraft server scanning operations."""
     
     BASE_URL = "https://api.mcsrvstat.us/2/"
+    # Seconds to collect history updates before writing them out together
+    SAVE_DELAY = 5.0
+    # Fold the update log back into the snapshot once it grows past this many bytes
+    COMPACT_SIZE = 1 << 20
     
     def __init__(self, data_dir):
         """Initialize the Minecraft Server Handler."""
         self.data_dir = data_dir
         self.logger = logging.getLogger(__name__)
         self.history_file = data_dir / "mc_server_history.json"
+        # Append-only ndjson of updates made since the snapshot above was written
+        self.history_log_file = data_dir / "mc_server_history.ndjson"
         self.server_history = self._load_history()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending = bytearray()
+        self._save_lock = asyncio.Lock()
+        self._save_task: Optional[asyncio.Task] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            )
+        return self._session
+
+    async def aclose(self):
+        """Writes pending history and closes the shared HTTP session."""
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        await self._save_history()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     def _load_history(self) -> Dict[str, Any]:
-        """Load server history from file."""
+        """Load server history from the snapshot, then replay the update log on top."""
+        history = {"servers": [], "player_history": {}}
         try:
             if self.history_file.exists():
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
+                history = orjson.loads(self.history_file.read_bytes())
         except Exception as e:
             self.logger.error(f"Error loading server history: {e}")
-        return {"servers": [], "player_history": {}}
-    
-    def _save_history(self):
-        """Save server history to file."""
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.server_history, f, indent=2)
+            if self.history_log_file.exists():
+                for line in self.history_log_file.read_bytes().splitlines():
+                    if line:
+                        self._apply_update(history, orjson.loads(line))
         except Exception as e:
-            self.logger.error(f"Error saving server history: {e}")
+            self.logger.error(f"Error replaying server history log: {e}")
+        return history
+
+    @staticmethod
+    def _apply_update(history: Dict[str, Any], update: Dict[str, str]):
+        """Applies one update log entry; replaying an entry twice is harmless."""
+        server = update["server"]
+        if server not in history["servers"]:
+            history["servers"].append(server)
+        player = update.get("player")
+        if player is None:
+            return
+        players = history["player_history"].setdefault(server, {})
+        seen = players.get(player)
+        if seen is None:
+            players[player] = {"first_seen": update["ts"], "last_seen": update["ts"]}
+        else:
+            seen["last_seen"] = update["ts"]
+
+    def _append_log(self, data: bytes) -> int:
+        """Appends update lines to the log and returns its new size."""
+        with open(self.history_log_file, "ab") as f:
+            f.write(data)
+            return f.tell()
+
+    def _compact(self, snapshot: bytes):
+        """Replaces the snapshot and empties the update log it now contains."""
+        write_bytes_atomic(self.history_file, snapshot)
+        self.history_log_file.write_bytes(b"")
+
+    async def _save_history(self):
+        """Append pending updates to the log, compacting it into the snapshot when large."""
+        async with self._save_lock:
+            if not self._pending:
+                return
+            pending, self._pending = bytes(self._pending), bytearray()
+            try:
+                size = await asyncio.to_thread(self._append_log, pending)
+                if size >= self.COMPACT_SIZE:
+                    # Serialize on the loop so the history cannot change mid-dump
+                    snapshot = orjson.dumps(self.server_history, option=orjson.OPT_INDENT_2)
+                    await asyncio.to_thread(self._compact, snapshot)
+            except Exception as e:
+                self.logger.error(f"Error saving server history: {e}")
+
+    async def _delayed_save(self):
+        await asyncio.sleep(self.SAVE_DELAY)
+        await self._save_history()
+
+    def _schedule_save(self):
+        """Makes sure one delayed save is pending."""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._delayed_save())
     
     async def search_servers(self, query: str = "") -> Dict[str, Any]:
         """Search for Minecraft servers.
@@ -79,18 +159,19 @@ class MCServerHandler:
     async def _query_server(self, address: str) -> Dict[str, Any]:
         """Query a Minecraft server using the mcsrvstat API."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.BASE_URL}{address}", timeout=10) as response:
-                    if response.status != 200:
-                        return {"error": f"Failed to fetch server info: {response.status}"}
-                        
-                    data = await response.json()
-                    
-                    # Update server history
-                    if "online" in data and data["online"]:
-                        self._update_server_history(address, data)
+            async with self._get_session().get(f"{self.BASE_URL}{address}") as response:
+                if response.status != 200:
+                    return {"error": f"Failed to fetch server info: {response.status}"}
                     
-                    return data
+                data = orjson.loads(await response.read())
+                # Built once here so rendering the result does no string work
+                data["_display"] = self._display_fields(data)
+                
+                # Update server history
+                if "online" in data and data["online"]:
+                    self._update_server_history(address, data)
+                
+                return data
         except asyncio.TimeoutError:
             return {"error": "Server query timed out. The server might be offline or not responding."}
         except Exception as e:
@@ -100,29 +181,70 @@ class MCServerHandler:
     def _update_server_history(self, address: str, server_data: Dict[str, Any]):
         """Update server and player history."""
         address = address.lower()
-        
-        # Update server list
+
+        updates = []
         if address not in self.server_history["servers"]:
-            self.server_history["servers"].append(address)
-        
+            updates.append({"server": address})
+
         # Update player history
         if "players" in server_data and "list" in server_data["players"]:
-            current_players = set(server_data["players"]["list"])
             timestamp = datetime.utcnow().isoformat()
-            
-            if address not in self.server_history["player_history"]:
-                self.server_history["player_history"][address] = {}
-            
-            # Add new players to history
-            for player in current_players:
-                if player not in self.server_history["player_history"][address]:
-                    self.server_history["player_history"][address][player] = {"first_seen": timestamp, "last_seen": timestamp}
-                else:
-                    self.server_history["player_history"][address][player]["last_seen"] = timestamp
-            
-            # Save the updated history
-            self._save_history()
+            updates.extend(
+                {"server": address, "player": player, "ts": timestamp}
+                for player in set(server_data["players"]["list"])
+            )
+
+        for update in updates:
+            self._apply_update(self.server_history, update)
+            self._pending += orjson.dumps(update)
+            self._pending += b"\n"
+        if updates:
+            self._schedule_save()
     
+    @staticmethod
+    def _display_fields(server_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """Precomputes the strings format_server_embed shows for a successful query."""
+        online = server_data.get("online", False)
+        fields: Dict[str, Optional[str]] = {
+            "title": f"{server_data.get('motd', {}).get('clean', ['Unknown'])[0]}",
+            "status": "🟢 Online" if online else "🔴 Offline",
+            "thumbnail_url": None,
+            "version": server_data.get("version"),
+            "players_name": None,
+            "players_value": None,
+            "plugins": None,
+            "footer": None,
+        }
+        
+        icon = server_data.get("icon")
+        if icon:
+            # mcsrvstat already sends a data: URI; only bare base64 needs the prefix
+            fields["thumbnail_url"] = icon if icon.startswith("data:") else f"data:image/png;base64,{icon}"
+        
+        # Players
+        if "players" in server_data:
+            players = server_data["players"]
+            player_list = "\n".join(players.get("list", []))
+            if len(player_list) > 1024:
+                # Discord rejects embed field values over 1024 characters
+                player_list = player_list[:1020].rsplit("\n", 1)[0] + "\n..."
+            fields["players_name"] = f"Players ({players.get('online', 0)}/{players.get('max', 0)})"
+            fields["players_value"] = player_list or "No players online"
+        
+        # Plugins (if available)
+        plugin_names = server_data.get("plugins", {}).get("names")
+        if plugin_names:
+            plugins = ", ".join(plugin_names[:10])  # Show first 10 plugins
+            if len(plugin_names) > 10:
+                plugins += f"... and {len(plugin_names) - 10} more"
+            fields["plugins"] = plugins
+        
+        # Additional info
+        ping = server_data.get("debug", {}).get("ping")
+        if ping is not None:
+            fields["footer"] = f"Ping: {ping}ms"
+        return fields
+
     @staticmethod
     def format_server_embed(server_data: Dict[str, Any], address: str) -> discord.Embed:
         """Format server data into a Discord embed."""
@@ -133,48 +255,25 @@ class MCServerHandler:
                 color=discord.Color.red()
             )
         
+        display = server_data.get("_display") or MCServerHandler._display_fields(server_data)
         embed = discord.Embed(
-            title=f"{server_data.get('motd', {}).get('clean', ['Unknown'])[0]}",
+            title=display["title"],
             description=f"`{address}`",
             color=discord.Color.green() if server_data.get("online", False) else discord.Color.red()
         )
         
-        if "icon" in server_data:
-            embed.set_thumbnail(url=f"data:image/png;base64,{server_data['icon']}")
-        
-        # Server status
-        status = "🟢 Online" if server_data.get("online", False) else "🔴 Offline"
-        embed.add_field(name="Status", value=status, inline=True)
+        if display["thumbnail_url"]:
+            embed.set_thumbnail(url=display["thumbnail_url"])
         
-        # Version
-        if "version" in server_data:
-            embed.add_field(name="Version", value=server_data["version"], inline=True)
-        
-        # Players
-        if "players" in server_data:
-            players = server_data["players"]
-            online = players.get("online", 0)
-            max_players = players.get("max", 0)
-            player_list = "\n".join(players.get("list", []))
-            
-            embed.add_field(
-                name=f"Players ({online}/{max_players})",
-                value=player_list or "No players online",
-                inline=False
-            )
-        
-        # Plugins (if available)
-        if "plugins" in server_data and "names" in server_data["plugins"] and server_data["plugins"]["names"]:
-            plugins = ", ".join(server_data["plugins"]["names"][:10])  # Show first 10 plugins
-            if len(server_data["plugins"]["names"]) > 10:
-                plugins += f"... and {len(server_data['plugins']['names']) - 10} more"
-            embed.add_field(name="Plugins", value=plugins, inline=False)
-        
-        # Additional info
-        if "debug" in server_data:
-            debug = server_data["debug"]
-            if "ping" in debug:
-                embed.set_footer(text=f"Ping: {debug['ping']}ms")
+        embed.add_field(name="Status", value=display["status"], inline=True)
+        if display["version"] is not None:
+            embed.add_field(name="Version", value=display["version"], inline=True)
+        if display["players_name"]:
+            embed.add_field(name=display["players_name"], value=display["players_value"], inline=False)
+        if display["plugins"]:
+            embed.add_field(name="Plugins", value=display["plugins"], inline=False)
+        if display["footer"]:
+            embed.set_footer(text=display["footer"])
         
         return embed
     
@@ -1,13 +1,40 @@
 """OAuth2 authentication handler with token validation."""
 
+import asyncio
 import json
+import time
+import weakref
 import httpx
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from datetime import datetime
 
 
+# Server-side prepared statements, created once per pooled connection
+_PREPARED_STATEMENTS = {
+    "bot_users_auth": """
+        SELECT access_token, expires_at, refresh_token
+        FROM bot_users
+        WHERE discord_user_id = $1
+    """,
+    "bot_users_data": """
+        SELECT username, avatar, code, access_token, refresh_token, expires_at
+        FROM bot_users
+        WHERE discord_user_id = $1
+    """,
+    "bot_user_emails": """
+        SELECT email, timestamp
+        FROM bot_user_emails
+        WHERE discord_user_id = $1
+        ORDER BY timestamp DESC
+    """,
+}
+
+
 class OAuthHandler:
+    # Seconds a successful Postgres authorization check is reused for the same user
+    AUTH_CACHE_TTL = 30.0
+
     def __init__(
         self,
         db_type: str = "json",
@@ -26,9 +53,19 @@ class OAuthHandler:
         
         # PostgreSQL pool
         self.pg_pool = None
+        # user_id -> time.monotonic() of the last successful check
+        self._auth_cache: Dict[str, float] = {}
+        # Pooled connections that already hold _PREPARED_STATEMENTS; weak so a closed
+        # connection drops out instead of a new one inheriting its id()
+        self._prepared_conns: weakref.WeakSet = weakref.WeakSet()
         
         # JSON file path
         self.oauth_file = None
+        # userId -> entry, rebuilt when the file's (mtime_ns, size) changes
+        self._oauth_index: Dict[str, Dict] = {}
+        # userId -> parsed tokens.expires_at, for entries whose expiry parses
+        self._oauth_expiry: Dict[str, datetime] = {}
+        self._oauth_stamp: Optional[Tuple[int, int]] = None
         
         # Initialize based on database type
         if self.db_type == "postgres":
@@ -50,7 +87,8 @@ class OAuthHandler:
         try:
             from psycopg2 import pool
             
-            self.pg_pool = pool.SimpleConnectionPool(
+            # Threaded: lookups run in worker threads via asyncio.to_thread
+            self.pg_pool = pool.ThreadedConnectionPool(
                 1,
                 10,
                 dsn=self.db_url,
@@ -68,6 +106,17 @@ class OAuthHandler:
             self.db_type = "json"
             self._init_json()
 
+    def _prepared_cursor(self, conn):
+        """Returns a cursor on `conn`, preparing the statements on its first use."""
+        cur = conn.cursor()
+        if conn not in self._prepared_conns:
+            # Clears statements left over if this connection was prepared before an error
+            cur.execute("DEALLOCATE ALL")
+            for name, query in _PREPARED_STATEMENTS.items():
+                cur.execute(f"PREPARE {name} AS {query}")
+            self._prepared_conns.add(conn)
+        return cur
+
     def _init_json(self):
         """Initialize JSON file storage."""
         if self.db_url.startswith("file://"):
@@ -75,6 +124,41 @@ class OAuthHandler:
         else:
             self.oauth_file = Path(self.db_url)
 
+    def _load_oauth_index(self) -> Optional[Dict[str, Dict]]:
+        """Returns the JSON entries keyed by userId, re-reading the file only when it changed."""
+        if not self.oauth_file:
+            return None
+        try:
+            stat = self.oauth_file.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._oauth_stamp:
+            try:
+                with open(self.oauth_file, "r", encoding="utf-8") as f:
+                    oauth_data = json.load(f)
+            except Exception as e:
+                print(f"[OAuth] Error loading OAuth data: {e}")
+                return None
+            index: Dict[str, Dict] = {}
+            expiry: Dict[str, datetime] = {}
+            for entry in oauth_data:
+                user_id = entry.get("userId")
+                # The first entry for a user wins, as with the old linear scan
+                if user_id in index:
+                    continue
+                index[user_id] = entry
+                expires_at = entry.get("tokens", {}).get("expires_at")
+                if expires_at:
+                    try:
+                        expiry[user_id] = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+                    except (TypeError, ValueError, AttributeError):
+                        pass
+            self._oauth_index = index
+            self._oauth_expiry = expiry
+            self._oauth_stamp = stamp
+        return self._oauth_index
+
     async def verify_access_token(self, access_token: str) -> bool:
         """Verifies if an access token is still valid by checking with Discord API."""
         if not access_token:
@@ -112,97 +196,114 @@ class OAuthHandler:
             return await self._is_user_authorized_json(user_id)
 
     async def _is_user_authorized_postgres(self, user_id: str) -> bool:
-        """Checks authorization in PostgreSQL with token validation."""
+        """Checks authorization in PostgreSQL, reusing recent positive results for the same user."""
+        user_id = str(user_id)
+        now = time.monotonic()
+        checked_at = self._auth_cache.get(user_id)
+        if checked_at is not None and now - checked_at < self.AUTH_CACHE_TTL:
+            return True
+
+        result = await self._query_authorized_postgres(user_id)
+        if not result:
+            # Only successes are cached, so a user who just authorized is seen on their next
+            # command; database errors (None) likewise retry
+            return False
+        if len(self._auth_cache) >= 4096:
+            self._auth_cache = {
+                uid: checked_at
+                for uid, checked_at in self._auth_cache.items()
+                if now - checked_at < self.AUTH_CACHE_TTL
+            }
+        self._auth_cache[user_id] = now
+        return True
+
+    def _fetch_auth_row(self, user_id: str) -> Optional[Tuple]:
+        """Blocking: returns (access_token, expires_at, refresh_token) for the user, or None."""
         conn = None
         try:
             conn = self.pg_pool.getconn()
-            cur = conn.cursor()
-            
-            # Check if user exists and has valid tokens
-            cur.execute(
-                """
-                SELECT access_token, expires_at, refresh_token
-                FROM bot_users
-                WHERE discord_user_id = %s
-                """,
-                (str(user_id),)
-            )
-            
-            result = cur.fetchone()
-            if not result:
-                return False
-            
-            access_token, expires_at, refresh_token = result
-            
-            # Check if we have a refresh token (means they've authorized)
-            if not refresh_token:
-                return False
-            
-            # Check if token is expired
-            if expires_at:
-                try:
-                    expiry_time = datetime.fromisoformat(str(expires_at))
-                    if datetime.now() < expiry_time:
-                        # Token not expired yet, verify it's still valid with Discord
-                        is_valid = await self.verify_access_token(access_token)
-                        if not is_valid:
-                            print(f"[OAuth] Token for user {user_id} is no longer valid with Discord")
-                        return is_valid
-                    else:
-                        print(f"[OAuth] Token expired for user {user_id}")
-                        return False
-                except:
-                    pass
-            
-            return False
-            
-        except Exception as e:
-            print(f"[OAuth] Error checking authorization in PostgreSQL: {e}")
-            return False
+            cur = self._prepared_cursor(conn)
+            cur.execute("EXECUTE bot_users_auth (%s)", (user_id,))
+            return cur.fetchone()
+        except Exception:
+            if conn:
+                # The pool may have replaced the connection; prepare again next time
+                self._prepared_conns.discard(conn)
+            raise
         finally:
             if conn:
                 self.pg_pool.putconn(conn)
 
-    async def _is_user_authorized_json(self, user_id: str) -> bool:
-        """Checks authorization in JSON file with token validation."""
-        if not self.oauth_file or not self.oauth_file.exists():
-            return False
-        
+    async def _query_authorized_postgres(self, user_id: str) -> Optional[bool]:
+        """Checks authorization in PostgreSQL with token validation; None on database errors."""
         try:
-            with open(self.oauth_file, "r", encoding="utf-8") as f:
-                oauth_data = json.load(f)
+            # psycopg2 blocks, so the query runs in a worker thread and the connection
+            # goes back to the pool before the Discord token check
+            result = await asyncio.to_thread(self._fetch_auth_row, str(user_id))
         except Exception as e:
-            print(f"[OAuth] Error loading OAuth data: {e}")
+            print(f"[OAuth] Error checking authorization in PostgreSQL: {e}")
+            return None
+
+        if not result:
             return False
         
-        for entry in oauth_data:
-            if entry.get("userId") == str(user_id):
-                tokens = entry.get("tokens", {})
-                access_token = tokens.get("access_token")
-                
-                # Check if token is expired
-                expires_at = tokens.get("expires_at")
-                if expires_at:
-                    try:
-                        expiry_time = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
-                        if datetime.now(expiry_time.tzinfo) < expiry_time:
-                            # Token not expired yet, verify it's still valid with Discord
-                            is_valid = await self.verify_access_token(access_token)
-                            if not is_valid:
-                                print(f"[OAuth] Token for user {user_id} is no longer valid with Discord")
-                            return is_valid
-                        else:
-                            print(f"[OAuth] Token expired for user {user_id}")
-                            return False
-                    except:
-                        pass
-                return True
+        access_token, expires_at, refresh_token = result
+        
+        # Check if we have a refresh token (means they've authorized)
+        if not refresh_token:
+            return False
+        
+        # Check if token is expired
+        if expires_at:
+            try:
+                # psycopg2 already returns timestamp columns as datetime
+                if isinstance(expires_at, datetime):
+                    expiry_time = expires_at
+                else:
+                    expiry_time = datetime.fromisoformat(str(expires_at))
+                if datetime.now() < expiry_time:
+                    # Token not expired yet, verify it's still valid with Discord
+                    is_valid = await self.verify_access_token(access_token)
+                    if not is_valid:
+                        print(f"[OAuth] Token for user {user_id} is no longer valid with Discord")
+                    return is_valid
+                else:
+                    print(f"[OAuth] Token expired for user {user_id}")
+                    return False
+            except:
+                pass
+        
         return False
 
-    def get_user_data(self, user_id: str) -> Optional[Dict]:
+    async def _is_user_authorized_json(self, user_id: str) -> bool:
+        """Checks authorization in JSON file with token validation."""
+        oauth_index = self._load_oauth_index()
+        if not oauth_index:
+            return False
+
+        entry = oauth_index.get(str(user_id))
+        if entry is None:
+            return False
+
+        # Check if token is expired; entries without a parseable expiry count as authorized
+        expiry_time = self._oauth_expiry.get(str(user_id))
+        if expiry_time is None:
+            return True
+        if datetime.now(expiry_time.tzinfo) >= expiry_time:
+            print(f"[OAuth] Token expired for user {user_id}")
+            return False
+
+        # Token not expired yet, verify it's still valid with Discord
+        access_token = entry.get("tokens", {}).get("access_token")
+        is_valid = await self.verify_access_token(access_token)
+        if not is_valid:
+            print(f"[OAuth] Token for user {user_id} is no longer valid with Discord")
+        return is_valid
+
+    async def get_user_data(self, user_id: str) -> Optional[Dict]:
         """Gets the OAuth data for a specific user."""
         if self.db_type == "postgres" and self.pg_pool:
-            return self._get_user_data_postgres(user_id)
+            return await asyncio.to_thread(self._get_user_data_postgres, user_id)
         else:
             return self._get_user_data_json(user_id)
 
@@ -211,17 +312,10 @@ class OAuthHandler:
         conn = None
         try:
             conn = self.pg_pool.getconn()
-            cur = conn.cursor()
+            cur = self._prepared_cursor(conn)
             
             # Get user data
-            cur.execute(
-                """
-                SELECT username, avatar, code, access_token, refresh_token, expires_at
-                FROM bot_users
-                WHERE discord_user_id = %s
-                """,
-                (str(user_id),)
-            )
+            cur.execute("EXECUTE bot_users_data (%s)", (str(user_id),))
             
             result = cur.fetchone()
             if not result:
@@ -230,15 +324,7 @@ class OAuthHandler:
             username, avatar, code, access_token, refresh_token, expires_at = result
             
             # Get email history
-            cur.execute(
-                """
-                SELECT email, timestamp
-                FROM bot_user_emails
-                WHERE discord_user_id = %s
-                ORDER BY timestamp DESC
-                """,
-                (str(user_id),)
-            )
+            cur.execute("EXECUTE bot_user_emails (%s)", (str(user_id),))
             
             emails = cur.fetchall()
             
@@ -257,6 +343,8 @@ class OAuthHandler:
             
         except Exception as e:
             print(f"[OAuth] Error getting user data from PostgreSQL: {e}")
+            if conn:
+                self._prepared_conns.discard(conn)
             return None
         finally:
             if conn:
@@ -264,20 +352,10 @@ class OAuthHandler:
 
     def _get_user_data_json(self, user_id: str) -> Optional[Dict]:
         """Gets user data from JSON file."""
-        if not self.oauth_file or not self.oauth_file.exists():
-            return None
-        
-        try:
-            with open(self.oauth_file, "r", encoding="utf-8") as f:
-                oauth_data = json.load(f)
-        except Exception as e:
-            print(f"[OAuth] Error loading OAuth data: {e}")
+        oauth_index = self._load_oauth_index()
+        if not oauth_index:
             return None
-        
-        for entry in oauth_data:
-            if entry.get("userId") == str(user_id):
-                return entry
-        return None
+        return oauth_index.get(str(user_id))
 
     def get_authorization_message(self, user_mention: str) -> str:
         """Generates the authorization required message."""
@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Optional, Dict
 from datetime import datetime
 
+from utils.helpers import write_json_atomic
+
 
 class PhoneHandler:
     def __init__(
@@ -175,8 +177,7 @@ class PhoneHandler:
                 "lookup_timestamp": datetime.now().isoformat()
             })
             
-            with open(self.phone_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.phone_file, data)
                 
             return lookup_id
             
@@ -1,7 +1,8 @@
 import asyncio
+import gc
 import re
 from collections import Counter
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 class WordStatsHandler:
@@ -78,6 +79,49 @@ class WordStatsHandler:
         loop = asyncio.get_running_loop()
         await loop.run_in_executor(None, self._store_counts, self._normalize_guild_id(guild_id), int(user_id), counts)
 
+    async def backfill_channel(self, channel, guild_id: int, skip_user_id: Optional[int], after=None) -> int:
+        """Records a channel's non-bot message history, oldest first; returns how many were recorded."""
+        processed = 0
+        # Messages are written in batches so each flush is one DB transaction
+        pending: List[Tuple[int, int, str]] = []
+        batch_size = 500
+        flushes = 0
+        async for message in channel.history(limit=None, after=after, oldest_first=True):
+            if message.author.bot or message.author.id == skip_user_id:
+                continue
+            pending.append((guild_id, message.author.id, message.content))
+            processed += 1
+            if len(pending) >= batch_size:
+                await self.record_messages_bulk(pending)
+                pending.clear()
+                flushes += 1
+                if flushes % 10 == 0:
+                    # Only `pending` outlives an iteration; sweep the young Message objects between batches
+                    gc.collect(0)
+                await asyncio.sleep(0)
+        await self.record_messages_bulk(pending)
+        return processed
+
+    async def record_messages_bulk(self, messages: List[Tuple[Optional[int], int, Optional[str]]]):
+        """Records many (guild_id, user_id, content) messages in a single transaction."""
+        if not self.available or not messages:
+            return
+        totals: Counter = Counter()
+        for guild_id, user_id, content in messages:
+            if not content:
+                continue
+            words = self._token_pattern.findall(content.lower())
+            if not words:
+                continue
+            key_prefix = (self._normalize_guild_id(guild_id), int(user_id))
+            for word, count in Counter(self._apply_spam_filter(words)).items():
+                totals[key_prefix + (word,)] += count
+        rows = [(guild_id, user_id, word, count) for (guild_id, user_id, word), count in totals.items() if word]
+        if not rows:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._store_rows, rows)
+
     def _apply_spam_filter(self, words: List[str]) -> List[str]:
         filtered: List[str] = []
         prev_word = None
@@ -96,15 +140,17 @@ class WordStatsHandler:
         return filtered
 
     def _store_counts(self, guild_id: int, user_id: int, counts: Counter):
+        rows = [(guild_id, user_id, word, int(count)) for word, count in counts.items() if word]
+        if rows:
+            self._store_rows(rows)
+
+    def _store_rows(self, rows: List[Tuple[int, int, str, int]]):
         if not self.pg_pool:
             return
         conn = None
         try:
             conn = self.pg_pool.getconn()
             cur = conn.cursor()
-            rows = [(guild_id, user_id, word, int(count)) for word, count in counts.items() if word]
-            if not rows:
-                return
             cur.executemany(
                 """
                 INSERT INTO word_usage (guild_id, user_id, word, count)
@@ -0,0 +1,128 @@
+"""Tests for AltsHandler's group merging and override isolation."""
+
+import json
+
+import pytest
+
+from handlers.alts_handler import AltsHandler, AltsRecord, _DisjointSet
+
+
+@pytest.fixture
+def alts_handler(tmp_path):
+    return AltsHandler(tmp_path, clean_spigey=False)
+
+
+def _write_overrides(handler, overrides):
+    handler.alts_override_file.write_text(json.dumps(overrides), encoding="utf-8")
+
+
+def _store(handler, users, ips=(), timestamp="2024-01-01T00:00:00"):
+    handler.store_alts_data(
+        {"main_user": users[0], "alts": list(users), "ips": list(ips), "timestamp": timestamp}
+    )
+
+
+def test_disjoint_set_components():
+    dsu = _DisjointSet()
+    dsu.union("a", "b")
+    dsu.union("c", "d")
+    dsu.find("e")
+    dsu.union("b", "d")
+    components = sorted(sorted(members) for members in dsu.components())
+    assert components == [["a", "b", "c", "d"], ["e"]]
+
+
+def test_merge_is_transitive_across_stores(alts_handler):
+    _store(alts_handler, ["a", "b"], ["1.1.1.1"])
+    _store(alts_handler, ["c", "d"], ["2.2.2.2"])
+    assert alts_handler.alts_data["a"].alts == {"a", "b"}
+
+    # b and c bridge the two groups, pulling a and d in through the stored records
+    _store(alts_handler, ["b", "c"])
+
+    for user in "abcd":
+        record = alts_handler.alts_data[user]
+        assert record.alts == {"a", "b", "c", "d"}
+        assert record.ips == {"1.1.1.1", "2.2.2.2"}
+    assert alts_handler.all_ips == {"1.1.1.1", "2.2.2.2"}
+
+
+def test_merged_group_shares_one_set(alts_handler):
+    _store(alts_handler, ["a", "b", "c"], ["1.1.1.1"])
+    records = [alts_handler.alts_data[user] for user in "abc"]
+    assert all(record.alts is records[0].alts for record in records)
+    assert all(record.ips is records[0].ips for record in records)
+
+
+def test_merge_within_one_batch_joins_overlapping_groups(alts_handler):
+    alts_handler._merge_groups(
+        [(["a", "b"], {"1.1.1.1"}), (["x"], set()), (["b", "c"], {"2.2.2.2"})],
+        "2024-01-01T00:00:00",
+    )
+    assert alts_handler.alts_data["a"].alts == {"a", "b", "c"}
+    assert alts_handler.alts_data["c"].ips == {"1.1.1.1", "2.2.2.2"}
+    assert alts_handler.alts_data["x"].alts == {"x"}
+
+
+def test_merge_marks_dirty_when_only_last_updated_changes(alts_handler):
+    _store(alts_handler, ["a", "b"], ["1.1.1.1"], timestamp="2024-01-01T00:00:00")
+    alts_handler._dirty = False
+    _store(alts_handler, ["a", "b"], ["1.1.1.1"], timestamp="2024-01-02T00:00:00")
+    assert alts_handler._dirty
+    assert alts_handler.alts_data["a"].last_updated == "2024-01-02T00:00:00"
+
+
+def test_override_isolates_accounts_and_ips(alts_handler):
+    _store(alts_handler, ["main", "x", "y", "z"], ["1.1.1.1", "2.2.2.2"])
+    alts_handler.alts_data["main"].ips.discard("2.2.2.2")
+    _write_overrides(alts_handler, {"main": {"alts": ["x"], "ips": ["3.3.3.3"]}})
+
+    assert alts_handler.apply_overrides("2024-01-02T00:00:00")
+
+    main, x = alts_handler.alts_data["main"], alts_handler.alts_data["x"]
+    assert main is x
+    assert main.alts == {"main", "x"}
+    assert main.ips == {"1.1.1.1", "3.3.3.3"}
+
+    # The rest of the old group keeps each other but loses the override's accounts and IPs
+    for user in "yz":
+        record = alts_handler.alts_data[user]
+        assert record.alts == {"y", "z"}
+        assert record.ips.isdisjoint(main.ips)
+    assert alts_handler.find_user("MAIN") == "main"
+    assert "3.3.3.3" in alts_handler.all_ips
+
+
+def test_override_strips_unshared_records(alts_handler):
+    # Records loaded from disk do not share sets, so each one must be stripped
+    for user in ("main", "y"):
+        alts_handler.alts_data[user] = AltsRecord(
+            alts={"main", "y"}, ips={"1.1.1.1"}, first_seen="2023-01-01T00:00:00"
+        )
+    alts_handler.rebuild_indexes()
+    _write_overrides(alts_handler, {"main": {"alts": []}})
+
+    assert alts_handler.apply_overrides("2024-01-02T00:00:00")
+
+    assert alts_handler.alts_data["main"].alts == {"main"}
+    assert alts_handler.alts_data["main"].first_seen == "2023-01-01T00:00:00"
+    assert alts_handler.alts_data["y"].alts == {"y"}
+    assert alts_handler.alts_data["y"].ips == set()
+
+
+def test_later_override_strips_earlier_override(alts_handler):
+    _store(alts_handler, ["a", "b", "c"])
+    _write_overrides(alts_handler, {"a": {"alts": ["b"]}, "c": {"alts": ["b"]}})
+
+    alts_handler.apply_overrides("2024-01-02T00:00:00")
+
+    assert alts_handler.alts_data["c"].alts == {"b", "c"}
+    assert alts_handler.alts_data["a"].alts == {"a"}
+
+
+def test_apply_overrides_is_idempotent(alts_handler):
+    _store(alts_handler, ["main", "x", "y"], ["1.1.1.1"])
+    _write_overrides(alts_handler, {"main": {"alts": ["x"]}})
+
+    assert alts_handler.apply_overrides("2024-01-02T00:00:00")
+    assert not alts_handler.apply_overrides("2024-01-02T00:00:00")
@@ -0,0 +1,47 @@
+"""Tests for IPHandler's VPN provider detection."""
+
+import pytest
+
+from handlers.ip_handler import IPHandler
+from utils.constants import VPN_PROVIDERS
+
+
+def _first_keyword_match(isp, org):
+    """The original linear scan: the first VPN_PROVIDERS keyword found wins."""
+    search_text = f"{isp or ''} {org or ''}".lower()
+    for keyword, provider_name in VPN_PROVIDERS.items():
+        if keyword in search_text:
+            return provider_name
+    return None
+
+
+@pytest.fixture
+def ip_handler(tmp_path):
+    return IPHandler(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "isp, org",
+    [
+        ("Mullvad VPN AB", ""),
+        ("", "Proton AG"),
+        ("M247 Europe SRL", "ProtonVPN"),
+        ("Deutsche Telekom AG", "Deutsche Telekom AG"),
+        (None, None),
+        ("NORDVPN S.A.", "Mullvad"),
+    ],
+)
+def test_detect_vpn_provider_matches_linear_scan(ip_handler, isp, org):
+    assert ip_handler.detect_vpn_provider(isp, org) == _first_keyword_match(isp, org)
+
+
+def test_detect_vpn_provider_every_keyword(ip_handler):
+    for keyword in VPN_PROVIDERS:
+        text = f"AS1234 {keyword.upper()} Networks"
+        assert ip_handler.detect_vpn_provider(text, "") == _first_keyword_match(text, "")
+
+
+def test_detect_vpn_provider_is_cached_per_pair(ip_handler):
+    first = ip_handler.detect_vpn_provider("Mullvad VPN AB", "31173 Services AB")
+    assert ip_handler._vpn_cache[("Mullvad VPN AB", "31173 Services AB")] == first
+    assert ip_handler.detect_vpn_provider("Mullvad VPN AB", "31173 Services AB") == first
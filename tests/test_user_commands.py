@@ -0,0 +1,112 @@
+"""Tests for UserCommands' cached, coalesced API fetches."""
+
+import asyncio
+
+import pytest
+
+from commands.user_commands import UserCommands
+
+
+@pytest.fixture
+def user_commands():
+    commands = UserCommands.__new__(UserCommands)
+    commands._api_cache = {}
+    commands._inflight = {}
+    commands._api_cache_ttl = 60.0
+    return commands
+
+
+class _SlowFetch:
+    """Counts calls and returns the call number after a short delay."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return call
+
+
+def test_cached_get_reuses_fresh_result(user_commands):
+    fetch = _SlowFetch(delay=0)
+
+    async def run():
+        first = await user_commands._cached_get(("key",), fetch)
+        second = await user_commands._cached_get(("key",), fetch)
+        return first, second
+
+    assert asyncio.run(run()) == (1, 1)
+    assert fetch.calls == 1
+
+
+def test_cached_get_coalesces_concurrent_callers(user_commands):
+    fetch = _SlowFetch()
+
+    async def run():
+        return await asyncio.gather(
+            *(user_commands._cached_get(("key",), fetch) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == [1] * 5
+    assert fetch.calls == 1
+    assert user_commands._inflight == {}
+
+
+def test_cached_get_shares_errors_without_caching(user_commands):
+    fetch = _SlowFetch(error=RuntimeError("boom"))
+
+    async def run():
+        return await asyncio.gather(
+            *(user_commands._cached_get(("key",), fetch) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert fetch.calls == 1
+    assert user_commands._api_cache == {}
+
+
+def test_cancelled_leader_does_not_cancel_waiters(user_commands):
+    fetch = _SlowFetch()
+
+    async def run():
+        leader = asyncio.create_task(user_commands._cached_get(("key",), fetch))
+        await asyncio.sleep(0.01)
+        waiters = [
+            asyncio.create_task(user_commands._cached_get(("key",), fetch)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        return leader, results
+
+    leader, results = asyncio.run(run())
+    assert leader.cancelled()
+    # The waiters retry with one new fetch between them instead of one each
+    assert results == [2, 2, 2]
+    assert fetch.calls == 2
+    assert user_commands._inflight == {}
+
+
+def test_cancelled_waiter_does_not_cancel_leader(user_commands):
+    fetch = _SlowFetch()
+
+    async def run():
+        leader = asyncio.create_task(user_commands._cached_get(("key",), fetch))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(user_commands._cached_get(("key",), fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await leader, waiter
+
+    result, waiter = asyncio.run(run())
+    assert result == 1
+    assert waiter.cancelled()
+    assert fetch.calls == 1
@@ -4,9 +4,25 @@ import re
 import os
 from typing import List
 from difflib import SequenceMatcher
+from functools import lru_cache
+from pathlib import Path
 import httpx
+import orjson
 
 
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Writes data to a temp file in one write, then swaps it into place."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path: Path, data) -> None:
+    """Writes data as indented JSON to a temp file in one write, then swaps it into place."""
+    write_bytes_atomic(path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+@lru_cache(maxsize=4096)
 def sanitize_filename(filename: str) -> str:
     """Sanitizes a string to be a valid filename."""
     filename = str(filename)
@@ -104,6 +120,7 @@ def is_likely_typo(original: str, edited: str) -> bool:
     return changed_words <= 2
 
 
+@lru_cache(maxsize=4096)
 def format_alt_name(username: str) -> str:
     """Formats a raw username for safe display and makes it clickable."""
     display_name = username
@@ -132,11 +149,13 @@ def format_alts_grid(alts: List[str], max_per_line: int = 3) -> List[str]:
     return lines
 
 
+@lru_cache(maxsize=1 << 17)
 def is_valid_ipv4(ip: str) -> bool:
     """Validates IPv4 address format."""
     return bool(re.match(r"^(?:\d{1,3}\.){3}\d{1,3}$", ip))
 
 
+@lru_cache(maxsize=1 << 17)
 def is_valid_ipv6(ip: str) -> bool:
     """Validates IPv6 address format (both compressed and uncompressed)."""
     # IPv6 pattern supporting both compressed (::) and uncompressed forms
@@ -163,6 +182,7 @@ def is_valid_ipv6(ip: str) -> bool:
     return bool(ipv6_pattern.match(ip))
 
 
+@lru_cache(maxsize=1 << 17)
 def is_valid_ip(ip: str) -> bool:
     """Validates both IPv4 and IPv6 addresses."""
     return is_valid_ipv4(ip) or is_valid_ipv6(ip)
@@ -0,0 +1,52 @@
+"""Client-side token-bucket rate limiting for external APIs."""
+
+import asyncio
+import time
+from typing import Dict, Tuple
+
+# Requests per second and burst size for each external API host
+API_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "ip-api.com": (45 / 60, 5),
+    "ip-api.com/batch": (15 / 60, 3),
+    "api.shodan.io": (1.0, 3),
+    "api.steampowered.com": (2.0, 5),
+    "playerdb.co": (2.0, 5),
+    "api.numlookupapi.com": (1.0, 3),
+}
+
+
+class TokenBucket:
+    """Asyncio-safe token bucket; `acquire` waits until a token is available."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Takes one token, sleeping until the bucket has refilled enough."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_bucket(host: str) -> TokenBucket:
+    """Returns the shared bucket for an API host, creating it on first use."""
+    bucket = _buckets.get(host)
+    if bucket is None:
+        rate, burst = API_RATE_LIMITS.get(host, (1.0, 5))
+        bucket = _buckets[host] = TokenBucket(rate, burst)
+    return bucket